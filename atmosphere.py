@@ -0,0 +1,71 @@
+import numpy as np
+
+# International Standard Atmosphere up to 84.852 km geopotential altitude
+GAS_CONSTANT = 287.05287  # J/(kg K), dry air
+GRAVITY = 9.80665
+SEA_LEVEL_TEMPERATURE = 288.15
+SEA_LEVEL_PRESSURE = 101325.0
+LAYER_BASES = np.array([0.0, 11000.0, 20000.0, 32000.0, 47000.0, 51000.0, 71000.0, 84852.0])
+LAPSE_RATES = np.array([-0.0065, 0.0, 0.001, 0.0028, 0.0, -0.0028, -0.002])
+
+# Sutherland's law for air
+SUTHERLAND_REFERENCE_VISCOSITY = 1.716e-5
+SUTHERLAND_REFERENCE_TEMPERATURE = 273.15
+SUTHERLAND_CONSTANT = 110.4
+
+
+def _layer_base_states():
+    # Temperature and pressure at the bottom of every layer, computed once
+    temperatures = [SEA_LEVEL_TEMPERATURE]
+    pressures = [SEA_LEVEL_PRESSURE]
+    for i, lapse in enumerate(LAPSE_RATES[:-1]):
+        thickness = LAYER_BASES[i + 1] - LAYER_BASES[i]
+        t0, p0 = temperatures[-1], pressures[-1]
+        t1 = t0 + lapse * thickness
+        if lapse == 0.0:
+            p1 = p0 * np.exp(-GRAVITY * thickness / (GAS_CONSTANT * t0))
+        else:
+            p1 = p0 * (t1 / t0) ** (-GRAVITY / (lapse * GAS_CONSTANT))
+        temperatures.append(t1)
+        pressures.append(p1)
+    return np.array(temperatures), np.array(pressures)
+
+
+BASE_TEMPERATURES, BASE_PRESSURES = _layer_base_states()
+
+
+def isa(altitude, temperature_offset=0.0):
+    # Temperature (K), pressure (Pa) and density (kg/m³) for arrays of
+    # geopotential altitudes. A temperature offset follows the ISA+dT
+    # convention: pressure stays standard, density follows the warmer or
+    # colder air.
+    altitude, temperature_offset = np.broadcast_arrays(np.asarray(altitude, dtype=float),
+                                                       np.asarray(temperature_offset, dtype=float))
+    h = np.clip(altitude, LAYER_BASES[0], LAYER_BASES[-1])
+    layer = np.clip(np.searchsorted(LAYER_BASES, h, side='right') - 1, 0, len(LAPSE_RATES) - 1)
+    lapse = LAPSE_RATES[layer]
+    dh = h - LAYER_BASES[layer]
+    t0, p0 = BASE_TEMPERATURES[layer], BASE_PRESSURES[layer]
+    temperature = t0 + lapse * dh
+    isothermal = lapse == 0.0
+    safe_lapse = np.where(isothermal, 1.0, lapse)
+    pressure = np.where(
+        isothermal,
+        p0 * np.exp(-GRAVITY * dh / (GAS_CONSTANT * t0)),
+        p0 * (temperature / t0) ** (-GRAVITY / (safe_lapse * GAS_CONSTANT))
+    )
+    temperature = temperature + temperature_offset
+    density = pressure / (GAS_CONSTANT * temperature)
+    return temperature, pressure, density
+
+
+def sutherland_viscosity(temperature):
+    t = np.asarray(temperature, dtype=float)
+    return (SUTHERLAND_REFERENCE_VISCOSITY * (t / SUTHERLAND_REFERENCE_TEMPERATURE) ** 1.5
+            * (SUTHERLAND_REFERENCE_TEMPERATURE + SUTHERLAND_CONSTANT) / (t + SUTHERLAND_CONSTANT))
+
+
+def air_properties(altitude, temperature_offset=0.0):
+    # Density (kg/m³) and dynamic viscosity (Pa s) in one vectorized call
+    temperature, _, density = isa(altitude, temperature_offset)
+    return density, sutherland_viscosity(temperature)
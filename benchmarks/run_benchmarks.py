@@ -0,0 +1,219 @@
+"""Headless benchmarks for every compute stage of the wind tunnel.
+
+Runs each stage on synthetic sphere, cube and car-like meshes, writes the
+timings as JSON and compares them with a stored baseline:
+
+    python benchmarks/run_benchmarks.py                    # compare with baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline  # record a new baseline
+    python benchmarks/run_benchmarks.py --full             # include 5M triangles
+
+Exits with status 1 when any stage is slower than its baseline by more
+than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyvista as pv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulation  # noqa: E402
+import visualization  # noqa: E402
+from cache import mesh_hash  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "baseline.json")
+RESULTS_FILE = os.path.join(HERE, "results.json")
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+FULL_SIZES = SIZES + [5_000_000]
+SHAPES = ["sphere", "cube", "car"]
+TUNNEL = (20.0, 10.0, 10.0)
+
+# Relative slowdown that counts as a regression, and an absolute floor so
+# that timer noise on sub-millisecond stages does not fail the run
+TOLERANCE = 0.25
+NOISE_FLOOR = 0.002
+
+
+def sphere_mesh(n_triangles):
+    resolution = max(8, int(np.sqrt(n_triangles / 2)))
+    return pv.Sphere(radius=1.0, theta_resolution=resolution, phi_resolution=resolution)
+
+
+def cube_mesh(n_triangles):
+    level = max(0, int(np.sqrt(n_triangles / 12)) - 1)
+    return pv.Box(bounds=(-1, 1, -1, 1, -1, 1), level=level, quads=False)
+
+
+def ellipsoid(center, radii, n_triangles):
+    resolution = max(8, int(np.sqrt(n_triangles / 1.7)))
+    part = pv.ParametricEllipsoid(*radii, u_res=resolution, v_res=resolution)
+    return part.translate(center, inplace=False)
+
+
+def car_mesh(n_triangles):
+    # Body, cabin and four wheels as separate parts
+    parts = [
+        ellipsoid((0.0, 0.0, 0.6), (2.2, 0.9, 0.45), 0.6 * n_triangles),
+        ellipsoid((-0.2, 0.0, 1.0), (1.0, 0.7, 0.35), 0.2 * n_triangles),
+    ]
+    for x in (-1.3, 1.3):
+        for y in (-0.85, 0.85):
+            parts.append(ellipsoid((x, y, 0.35), (0.35, 0.12, 0.35), 0.05 * n_triangles))
+    return pv.merge(parts).extract_surface(algorithm=None).triangulate()
+
+
+MESHES = {"sphere": sphere_mesh, "cube": cube_mesh, "car": car_mesh}
+
+
+def best_of(stage, repeat):
+    # Minimum wall time is the least noisy estimate of a stage's cost
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+    return min(times), float(np.mean(times))
+
+
+def benchmark_mesh(shape, n_triangles, workdir, repeat):
+    mesh = MESHES[shape](n_triangles)
+    stl_path = os.path.join(workdir, f"{shape}_{n_triangles}.stl")
+    mesh.save(stl_path, binary=True)
+
+    # The same calls the GUI makes, without a render window
+    state = {}
+
+    def load_stl():
+        loaded = simulation.place_on_floor(simulation.prepare_mesh(pv.read(stl_path)))
+        state["hash"] = mesh_hash(loaded)
+        state["mesh"] = loaded
+
+    def normals():
+        state["mesh"].compute_normals(auto_orient_normals=True)
+
+    def drag_integration():
+        centers, area_vectors, part_ids = simulation.cell_geometry(state["mesh"])
+        cp = simulation.pressure_coefficients(area_vectors)
+        state["loads"] = simulation.integrate_forces(centers, area_vectors, cp, 1.0, part_ids)
+
+    def range_analysis():
+        unit_drag = state["loads"]["force"] @ simulation.WIND_VECTOR
+        velocities, drag = simulation.adaptive_samples(
+            lambda v: simulation.dynamic_pressure(1.225, v) * unit_drag, 0.0, 30.0, budget=25, min_step=0.1)
+        simulation.range_results(velocities, drag)
+
+    def streamlines():
+        visualization.trace_streamlines(visualization.build_flow_grid(TUNNEL), TUNNEL)
+
+    def tunnel_pressure():
+        origin, spacing = visualization.pressure_grid_geometry(TUNNEL)
+        center, radius = simulation.equivalent_body(state["mesh"].bounds)
+        _, cp = simulation.potential_flow(visualization.grid_points(origin, spacing), center, radius)
+        volume = visualization.create_pressure_volume(origin, spacing)
+        visualization.update_pressure_volume(volume, origin, spacing, cp, simulation.dynamic_pressure(1.225, 20.0))
+
+    stages = [
+        ("load_stl", load_stl),
+        ("normals", normals),
+        ("drag_integration", drag_integration),
+        ("range_analysis", range_analysis),
+        ("streamlines", streamlines),
+        ("tunnel_pressure", tunnel_pressure),
+    ]
+    results = {}
+    # Very large meshes are timed once; smaller ones take the best of several
+    runs = repeat if n_triangles < 1_000_000 else 1
+    for name, stage in stages:
+        best, mean = best_of(stage, runs)
+        results[f"{shape}/{n_triangles}/{name}"] = {
+            "seconds": best,
+            "mean_seconds": mean,
+            "repeat": runs,
+            "n_triangles": int(state["mesh"].n_cells) if "mesh" in state else None,
+        }
+    os.remove(stl_path)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pyvista": pv.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    # Returns (key, baseline seconds, current seconds) for every regression
+    regressions = []
+    for key, entry in results.items():
+        if key not in baseline:
+            continue
+        before, after = baseline[key]["seconds"], entry["seconds"]
+        if after > before * (1 + tolerance) and after - before > NOISE_FLOOR:
+            regressions.append((key, before, after))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every compute stage on synthetic meshes.")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=SHAPES)
+    parser.add_argument("--sizes", type=int, nargs="+", help="triangle counts (default: 1k to 1M)")
+    parser.add_argument("--full", action="store_true", help="include 5M triangle meshes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (best is kept)")
+    parser.add_argument("--out", default=RESULTS_FILE, help="JSON results file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON baseline file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    # Without a baseline nothing can be compared, which must not pass
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one", file=sys.stderr)
+        return 1
+
+    sizes = args.sizes or (FULL_SIZES if args.full else SIZES)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for shape in args.shapes:
+            for n_triangles in sizes:
+                results.update(benchmark_mesh(shape, n_triangles, workdir, args.repeat))
+                for key in (k for k in results if k.startswith(f"{shape}/{n_triangles}/")):
+                    print(f"{key:40s} {results[key]['seconds'] * 1e3:10.2f} ms")
+
+    document = {"environment": environment(), "tolerance": args.tolerance, "results": results}
+    with open(args.out, "w") as f:
+        json.dump(document, f, indent=4)
+    print(f"Results written to {args.out}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=4)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION: {len(regressions)} stage(s) slower than baseline "
+              f"by more than {args.tolerance:.0%}")
+        for key, before, after in regressions:
+            print(f"  {key:40s} {before * 1e3:10.2f} ms -> {after * 1e3:10.2f} ms ({after / before:.2f}x)")
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+import hashlib
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+
+def mesh_hash(mesh):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(mesh.points).tobytes())
+    digest.update(np.ascontiguousarray(mesh.faces).tobytes())
+    return digest.hexdigest()
+
+
+def transform_key(matrix):
+    # Rounded so that a transform followed by its inverse gives the same key
+    return tuple((np.round(matrix, 9) + 0.0).ravel())
+
+
+def estimate_nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "actual_memory_size"):
+        # VTK reports kibibytes
+        return value.actual_memory_size * 1024
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    # LRU bounded by the estimated size of its results. A configuration
+    # fills about ten stage entries of very different sizes, so the byte
+    # budget is the limit that matters; max_entries is an optional extra cap.
+    def __init__(self, max_entries=None, max_bytes=256 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+
+    def put(self, key, value):
+        nbytes = estimate_nbytes(value)
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        # Results larger than the whole budget are returned but never stored
+        if nbytes > self.max_bytes:
+            return value
+        self.entries[key] = (value, nbytes)
+        self.total_bytes += nbytes
+        self.evict()
+        return value
+
+    def get_or_compute(self, key, compute):
+        if key in self.entries:
+            return self.get(key)
+        self.misses += 1
+        return self.put(key, compute())
+
+    def evict(self, max_bytes=None):
+        # Drop least recently used entries until both limits hold
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_entries = len(self.entries) if self.max_entries is None else self.max_entries
+        while self.entries and (len(self.entries) > max_entries or self.total_bytes > max_bytes):
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            self.total_bytes -= nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+
+class StageGraph:
+    # Each stage declares the parameters and upstream stages it reads; a
+    # stage recomputes only when the signature of those inputs changes.
+    # Results are also kept in an optional ResultCache so that returning to
+    # an earlier configuration is a lookup rather than a recomputation.
+    # An optional profiler times every stage that actually computes.
+    def __init__(self, cache=None, profiler=None):
+        self.cache = cache
+        self.profiler = profiler
+        self.stages = {}
+        self.params = {}
+        self.values = {}
+        self.compute_counts = {}
+
+    def add_stage(self, name, inputs, compute):
+        self.stages[name] = (tuple(inputs), compute)
+        self.compute_counts[name] = 0
+
+    def set_param(self, name, value, key=None):
+        # Unhashable values such as meshes pass a separate key
+        self.params[name] = (value, value if key is None else key)
+
+    def signature(self, name):
+        if name in self.params:
+            return self.params[name][1]
+        inputs, _ = self.stages[name]
+        return (name,) + tuple(self.signature(i) for i in inputs)
+
+    def get(self, name):
+        if name in self.params:
+            return self.params[name][0]
+        signature = self.signature(name)
+        current = self.values.get(name)
+        if current is not None and current[0] == signature:
+            return current[1]
+
+        inputs, compute = self.stages[name]
+
+        def run():
+            kwargs = {i: self.get(i) for i in inputs}
+            self.compute_counts[name] += 1
+            if self.profiler is None:
+                return compute(**kwargs)
+            with self.profiler.stage(name):
+                return compute(**kwargs)
+
+        if self.cache is not None:
+            value = self.cache.get_or_compute(signature, run)
+        else:
+            value = run()
+        self.values[name] = (signature, value)
+        return value
+
+    def invalidate(self, name=None):
+        if name is None:
+            self.values.clear()
+        else:
+            self.values.pop(name, None)
+
+
+class MemoryAccountant:
+    # Live byte counts for named artefacts (meshes, fields, streamlines) and
+    # the result cache, checked against a budget. Past the budget the cache
+    # is evicted first; registered reducers (e.g. downsampling a field) then
+    # run in order until usage fits.
+    def __init__(self, budget_bytes=None, cache=None):
+        self.budget_bytes = budget_bytes
+        self.cache = cache
+        self.artefacts = {}
+        self.reducers = []
+        self.enforcing = False
+
+    def track(self, name, getter):
+        self.artefacts[name] = getter
+
+    def add_reducer(self, name, reduce):
+        # reduce() returns True when it released something
+        self.reducers.append((name, reduce))
+
+    def usage(self):
+        # Objects held in several places (e.g. a cache entry that is also
+        # the current streamlines) are counted once, under the first owner
+        seen = set()
+        usage = {}
+        if self.cache is not None:
+            seen.update(id(value) for value, _ in self.cache.entries.values())
+            usage["cache"] = self.cache.total_bytes
+        for name, getter in self.artefacts.items():
+            usage[name] = self.unseen_nbytes(getter(), seen)
+        return usage
+
+    def unseen_nbytes(self, value, seen):
+        if value is None or id(value) in seen:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, (list, tuple)):
+            return sum(self.unseen_nbytes(v, seen) for v in value)
+        return estimate_nbytes(value)
+
+    def total(self):
+        return sum(self.usage().values())
+
+    def enforce(self):
+        # Returns the names of the actions taken to get back under budget
+        actions = []
+        # Reducers may trigger further checks, which must not recurse
+        if self.budget_bytes is None or self.enforcing:
+            return actions
+        self.enforcing = True
+        try:
+            excess = self.total() - self.budget_bytes
+            if excess > 0 and self.cache is not None and self.cache.total_bytes > 0:
+                self.cache.evict(max_bytes=max(self.cache.total_bytes - excess, 0))
+                actions.append("cache")
+            # Each reducer is applied repeatedly until it fits or has nothing left
+            for name, reduce in self.reducers:
+                while self.total() > self.budget_bytes and reduce():
+                    if name not in actions:
+                        actions.append(name)
+        finally:
+            self.enforcing = False
+        return actions
@@ -0,0 +1,111 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pyvista as pv
+
+import simulation
+from cache import mesh_hash
+from results_store import ResultsStore, config_key
+
+# Per-process cache of prepared models: path -> (hash, centers, area vectors, part ids)
+_models = {}
+
+
+def load_geometry(model_path):
+    if model_path not in _models:
+        mesh = simulation.place_on_floor(simulation.prepare_mesh(pv.read(model_path)))
+        _models[model_path] = (mesh_hash(mesh),) + simulation.cell_geometry(mesh)
+    return _models[model_path]
+
+
+def expand_campaign(spec):
+    # Every combination of the listed models, flow conditions, orientations
+    # and scales; the mesh hash ties each configuration to the model content
+    tunnel = spec.get("tunnel", {"length": 20.0, "width": 10.0, "height": 10.0})
+    position = spec.get("object_position", [0.0, 0.0, 0.0])
+    configs = []
+    for model in spec["models"]:
+        model_hash = load_geometry(model)[0]
+        for velocity, density, yaw, pitch, scale in itertools.product(
+                spec.get("velocity", [20.0]), spec.get("density", [1.225]),
+                spec.get("yaw", [0.0]), spec.get("pitch", [0.0]), spec.get("scale", [[1.0, 1.0, 1.0]])):
+            configs.append({
+                "model": os.path.basename(model),
+                "model_path": model,
+                "mesh_hash": model_hash,
+                "tunnel": tunnel,
+                "flow": {"velocity": velocity, "density": density,
+                         "viscosity": spec.get("viscosity", 1.8e-5)},
+                "scale": {"scale_x": scale[0], "scale_y": scale[1], "scale_z": scale[2]},
+                "object_position": position,
+                "yaw": yaw,
+                "pitch": pitch,
+                "ground": False,
+                "blockage_correction": True,
+                "reference_point": spec.get("reference_point", position)
+            })
+    return configs
+
+
+def run_configuration(config):
+    _, centers, area_vectors, part_ids = load_geometry(config["model_path"])
+    scale = np.diag([config["scale"][k] for k in ("scale_x", "scale_y", "scale_z")])
+    matrix = simulation.rotation_matrices(config["yaw"], config["pitch"]) @ scale
+    centers, area_vectors = simulation.transform_geometry(centers, area_vectors, matrix,
+                                                          config["object_position"])
+    velocity = config["flow"]["velocity"]
+    q = simulation.dynamic_pressure(config["flow"]["density"], velocity)
+    cp = simulation.pressure_coefficients(area_vectors)
+    reference_point = config["reference_point"]
+    loads = simulation.integrate_forces(centers, area_vectors, cp, q, part_ids, reference_point=reference_point)
+    # Forces are always reported blockage-corrected; the config records it
+    projected = float(simulation.projected_area(area_vectors))
+    tunnel = config["tunnel"]
+    blockage = float(simulation.blockage_ratio(projected, simulation.tunnel_cross_section(
+        (tunnel["length"], tunnel["width"], tunnel["height"]))))
+    loads = {k: v * simulation.blockage_correction(blockage) for k, v in loads.items()}
+    drag = float(loads["force"] @ simulation.WIND_VECTOR)
+    return {
+        "drag_force_N": drag,
+        "power_W": drag * velocity,
+        "frontal_area": projected,
+        "blockage_ratio": blockage,
+        "force_N": loads["force"].tolist(),
+        "moment_Nm": loads["moment"].tolist(),
+        "center_of_pressure": simulation.center_of_pressure(loads["force"], loads["moment"],
+                                                            reference_point).tolist(),
+        "coefficients": dict(zip(simulation.COEFFICIENT_NAMES, simulation.aero_coefficients(
+            loads["force"], loads["moment"], q, projected, np.sqrt(projected)).tolist())),
+        "part_forces_N": loads["part_forces"].tolist(),
+        "part_moments_Nm": loads["part_moments"].tolist()
+    }
+
+
+def run_campaign(spec, store_path, workers=None, progress=None):
+    store = ResultsStore(store_path)
+    done = store.completed_keys()
+    # Resume: anything already in the store is skipped, and a configuration
+    # listed twice in the spec runs once
+    pending, skipped, seen = [], 0, set()
+    for config in expand_campaign(spec):
+        key = config_key(config)
+        if key in done:
+            skipped += 1
+        elif key not in seen:
+            seen.add(key)
+            pending.append(config)
+    completed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_configuration, c): c for c in pending}
+            # Rows are written as each result arrives, not at the end
+            for future in as_completed(futures):
+                store.append(futures[future], future.result())
+                completed += 1
+                if progress is not None:
+                    progress(completed, len(pending))
+    finally:
+        store.close()
+    return completed, skipped
@@ -0,0 +1,309 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+import pyvista as pv
+
+import simulation
+import visualization
+
+
+def load_model(file_path):
+    # Same preparation as the GUI's Load STL
+    return simulation.place_on_floor(simulation.prepare_mesh(pv.read(file_path)))
+
+
+def cmd_render(args):
+    os.makedirs(args.out, exist_ok=True)
+    tunnel = tuple(args.tunnel)
+    renderer = visualization.OffscreenRenderer(tunnel, window_size=tuple(args.size))
+    streamlines = visualization.trace_streamlines(visualization.build_flow_grid(tunnel), tunnel)
+    # One colour range for the whole batch keeps the images comparable
+    q_max = simulation.dynamic_pressure(args.density, max(args.velocity))
+    clim = (simulation.BASE_CP * q_max, simulation.STAGNATION_CP * q_max)
+
+    count = 0
+    for model_path in args.models:
+        mesh = load_model(model_path)
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        _, area_vectors, _ = simulation.cell_geometry(mesh)
+        renderer.set_object(mesh)
+        for yaw in args.yaw:
+            for pitch in args.pitch:
+                rotation = simulation.rotation_matrices(yaw, pitch)
+                cp = simulation.pressure_coefficients(area_vectors @ rotation.T)
+                if 'pressure' in args.views:
+                    renderer.show(object_visible=True, streamlines_visible=False)
+                    for velocity in args.velocity:
+                        q = simulation.dynamic_pressure(args.density, velocity)
+                        renderer.update_pressure(cp, q, rotation, clim)
+                        renderer.screenshot(os.path.join(
+                            args.out, f"{stem}_yaw{yaw:g}_pitch{pitch:g}_v{velocity:g}_pressure.png"))
+                        count += 1
+                if 'streamlines' in args.views:
+                    # Streamline paths do not depend on the velocity magnitude
+                    renderer.set_streamlines(streamlines)
+                    renderer.update_pressure(cp, q_max, rotation, clim)
+                    renderer.show(object_visible=True, streamlines_visible=True)
+                    renderer.screenshot(os.path.join(
+                        args.out, f"{stem}_yaw{yaw:g}_pitch{pitch:g}_streamlines.png"))
+                    count += 1
+    renderer.close()
+    print(f"Rendered {count} images to {args.out}")
+    return 0
+
+
+def cmd_animate(args):
+    tunnel = tuple(args.tunnel)
+    mesh = load_model(args.model)
+    centers, area_vectors, part_ids = simulation.cell_geometry(mesh)
+    values = np.arange(args.start, args.end + args.step/2, args.step)
+
+    if args.sweep == "velocity":
+        if args.velocity is not None:
+            args.error("--velocity does not apply to a velocity sweep; use --start/--end/--step")
+        # The object is held at the requested orientation
+        rotation = simulation.rotation_matrices(args.yaw or 0.0, args.pitch)
+        centers, area_vectors = simulation.transform_geometry(centers, area_vectors, rotation)
+        cp = simulation.pressure_coefficients(area_vectors)
+        unit_drag = simulation.integrate_forces(centers, area_vectors, cp, 1.0)["force"] @ simulation.WIND_VECTOR
+        q = simulation.dynamic_pressure(args.density, values)
+        frames = visualization.velocity_sweep_frames(cp, values, args.density, unit_drag * q, rotation)
+        q_max = q.max()
+    else:
+        if args.yaw is not None:
+            args.error("--yaw does not apply to a yaw sweep; use --start/--end/--step")
+        velocity = 20.0 if args.velocity is None else args.velocity
+        q_max = simulation.dynamic_pressure(args.density, velocity)
+        pitches = np.full_like(values, args.pitch)
+        drag = simulation.orientation_sweep(area_vectors, values, [args.pitch], q_max)["drag_forces"][0]
+        frames = visualization.orientation_sweep_frames(area_vectors, values, pitches, q_max, drag)
+
+    renderer = visualization.OffscreenRenderer(tunnel, window_size=tuple(args.size))
+    renderer.set_object(mesh)
+    if args.streamlines:
+        renderer.set_streamlines(visualization.trace_streamlines(visualization.build_flow_grid(tunnel), tunnel))
+    clim = (simulation.BASE_CP * q_max, simulation.STAGNATION_CP * q_max)
+    count = visualization.write_animation(renderer, frames, args.out, clim, fps=args.fps)
+    renderer.close()
+    print(f"Wrote {count} frames to {args.out}")
+    return 0
+
+
+def cmd_fields(args):
+    tunnel = tuple(args.tunnel)
+    velocity = args.velocity
+    q = simulation.dynamic_pressure(args.density, velocity)
+    mesh = load_model(args.model)
+    # Rotated about the origin, as the GUI's rotate buttons do
+    matrix = np.eye(4)
+    matrix[:3, :3] = simulation.rotation_matrices(args.yaw, args.pitch)
+    mesh.transform(matrix, inplace=True)
+    _, area_vectors, _ = simulation.cell_geometry(mesh)
+    mesh.cell_data["Cp"] = simulation.pressure_coefficients(area_vectors)
+    mesh.cell_data["pressure"] = q * mesh.cell_data["Cp"]
+
+    origin, spacing = visualization.pressure_grid_geometry(tunnel)
+    points = visualization.grid_points(origin, spacing)
+    velocity_field, cp = simulation.potential_flow(points, *simulation.equivalent_body(mesh.bounds))
+    volume = visualization.field_dataset(origin, spacing, {"velocity": velocity_field, "cp": cp}, velocity, q)
+    streamlines = visualization.trace_streamlines(visualization.build_flow_grid(tunnel), tunnel)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    visualization.export_fields(args.out, volume, streamlines, mesh)
+    print(f"Fields exported to: {args.out}")
+    return 0
+
+
+def cmd_campaign(args):
+    import campaign
+    with open(args.spec) as f:
+        spec = json.load(f)
+    completed, skipped = campaign.run_campaign(spec, args.store, workers=args.workers)
+    print(f"Campaign finished: {completed} new runs, {skipped} already stored in {args.store}")
+    return 0
+
+
+def cmd_query(args):
+    from results_store import ResultsStore
+    filters = {}
+    if args.model:
+        filters["model"] = args.model
+    if args.mesh_hash:
+        filters["mesh_hash"] = args.mesh_hash
+    store = ResultsStore(args.store)
+    try:
+        data = store.query(*args.where, columns=args.columns, order_by=args.order_by,
+                           limit=args.limit, **filters)
+    finally:
+        store.close()
+    writer = csv.writer(sys.stdout)
+    writer.writerow(data.dtype.names)
+    writer.writerows(data.tolist())
+    return 0
+
+
+def cmd_predict(args):
+    # Drag from a response surface over stored (pitch, yaw) runs, without
+    # running the solver; prints CSV
+    from results_store import ResultsStore
+    from surrogate import BODY_COLUMNS, DragSurrogate
+    filters = {}
+    if args.model:
+        filters["model"] = args.model
+    if args.mesh_hash:
+        filters["mesh_hash"] = args.mesh_hash
+    store = ResultsStore(args.store)
+    try:
+        records = store.query(*args.where, columns=["velocity", "density", "yaw", "pitch", "drag_force_N",
+                                                    *BODY_COLUMNS], order_by=None, **filters)
+    finally:
+        store.close()
+    surrogate = DragSurrogate.from_records(records)
+    yaw, pitch, velocity = (a.ravel() for a in np.meshgrid(args.yaw, args.pitch, args.velocity, indexing="ij"))
+    batch = {"yaw": yaw, "pitch": pitch, "velocity": velocity, "density": np.full(len(yaw), args.density)}
+    drag, error = surrogate.predict(batch, return_error=True)
+    inside = surrogate.inside(surrogate.points(batch))
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["yaw", "pitch", "velocity", "density", "drag_force_N", "error_N", "interpolated"])
+    writer.writerows(zip(yaw, pitch, velocity, batch["density"], drag, error, inside))
+    if not inside.all():
+        print(f"{np.count_nonzero(~inside)} point(s) outside the stored grid are NaN", file=sys.stderr)
+    return 0
+
+
+def cmd_optimize(args):
+    import optimization
+    mesh = load_model(args.model)
+    centers, area_vectors, _ = simulation.cell_geometry(mesh)
+    q = simulation.dynamic_pressure(args.density, args.velocity)
+    params, drag, info = optimization.optimize_drag(centers, area_vectors, q, args.params,
+                                                    keep_volume=not args.free_volume,
+                                                    max_iter=args.max_iter, workers=args.workers)
+    print(f"Drag (free stream, uncorrected): {info['initial_drag']:.2f} N -> {drag:.2f} N "
+          f"({info['evaluations']} evaluations, {info['iterations']} iterations)")
+    for name, value in params.items():
+        print(f"  {name}: {value:.4f}")
+    return 0
+
+
+def cmd_validate(args):
+    import validation
+    resolutions = [validation.RESOLUTIONS.get(r) or int(r) for r in args.resolutions]
+    rows = validation.run_validation(args.cases, resolutions)
+    print(validation.format_report(rows))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=4)
+        print(f"Validation results written to {args.out}")
+    return 0
+
+
+def add_flow_arguments(parser, tunnel=True, orientation=True, several=True):
+    # Each command registers only the flags it honours; with several=False
+    # velocity and angles take exactly one value
+    if tunnel:
+        parser.add_argument("--tunnel", type=float, nargs=3, default=[20.0, 10.0, 10.0],
+                            metavar=("LENGTH", "WIDTH", "HEIGHT"), help="tunnel dimensions (m)")
+    if several:
+        parser.add_argument("--velocity", type=float, nargs="+", default=[20.0], help="velocities (m/s)")
+    else:
+        parser.add_argument("--velocity", type=float, default=20.0, help="velocity (m/s)")
+    parser.add_argument("--density", type=float, default=1.225, help="air density (kg/m³)")
+    if orientation and several:
+        parser.add_argument("--yaw", type=float, nargs="+", default=[0.0], help="yaw angles (°)")
+        parser.add_argument("--pitch", type=float, nargs="+", default=[0.0], help="pitch angles (°)")
+    elif orientation:
+        parser.add_argument("--yaw", type=float, default=0.0, help="yaw angle (°)")
+        parser.add_argument("--pitch", type=float, default=0.0, help="pitch angle (°)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless tools for the virtual wind tunnel.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="render pressure maps and streamlines off screen")
+    render.add_argument("models", nargs="+", help="STL files")
+    add_flow_arguments(render)
+    render.add_argument("--views", nargs="+", choices=["pressure", "streamlines"],
+                        default=["pressure", "streamlines"])
+    render.add_argument("--size", type=int, nargs=2, default=[1024, 768], metavar=("WIDTH", "HEIGHT"))
+    render.add_argument("--out", default="renders", help="output directory")
+    render.set_defaults(func=cmd_render)
+
+    animate = commands.add_parser("animate", help="stream a velocity or yaw sweep into a video file")
+    animate.add_argument("model", help="STL file")
+    add_flow_arguments(animate, several=False)
+    # The swept quantity comes from --start/--end/--step, so its flag is rejected
+    animate.set_defaults(velocity=None, yaw=None, error=animate.error)
+    animate.add_argument("--sweep", choices=["velocity", "yaw"], default="velocity")
+    animate.add_argument("--start", type=float, default=0.0)
+    animate.add_argument("--end", type=float, default=30.0)
+    animate.add_argument("--step", type=float, default=0.5)
+    animate.add_argument("--streamlines", action="store_true", help="overlay the streamlines")
+    animate.add_argument("--fps", type=int, default=24)
+    animate.add_argument("--size", type=int, nargs=2, default=[1024, 768], metavar=("WIDTH", "HEIGHT"))
+    animate.add_argument("--out", default="sweep.mp4", help="video file (.mp4, .gif, ...)")
+    animate.set_defaults(func=cmd_animate)
+
+    fields = commands.add_parser("fields", help="export flow, streamline and surface fields as binary VTK XML")
+    fields.add_argument("model", help="STL file")
+    add_flow_arguments(fields, several=False)
+    fields.add_argument("--out", default="fields.vtm", help=".vtm (all fields) or .vti (flow volume only)")
+    fields.set_defaults(func=cmd_fields)
+
+    batch = commands.add_parser("campaign", help="run a batch campaign into an append-only results store")
+    batch.add_argument("spec", help="campaign JSON (models, velocity, density, yaw, pitch, scale, tunnel)")
+    batch.add_argument("--store", default="wind_tunnel_results.db", help="SQLite results store")
+    batch.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    batch.set_defaults(func=cmd_campaign)
+
+    query = commands.add_parser("query", help="look up stored runs; prints CSV")
+    query.add_argument("--store", default="wind_tunnel_results.db", help="SQLite results store")
+    query.add_argument("--model", help="model file name")
+    query.add_argument("--mesh-hash", help="model content hash")
+    query.add_argument("--where", nargs="+", default=[], metavar="CONDITION",
+                       help='conditions such as "velocity>=20" "yaw<5"')
+    query.add_argument("--columns", nargs="+", help="columns to print (default: all)")
+    query.add_argument("--order-by", default="velocity")
+    query.add_argument("--limit", type=int)
+    query.set_defaults(func=cmd_query)
+
+    predict = commands.add_parser("predict", help="estimate drag from stored runs without solving; prints CSV")
+    predict.add_argument("--store", default="wind_tunnel_results.db", help="SQLite results store")
+    predict.add_argument("--model", help="model file name")
+    predict.add_argument("--mesh-hash", help="model content hash")
+    predict.add_argument("--where", nargs="+", default=[], metavar="CONDITION",
+                         help='conditions selecting the runs, such as "scale_x=1"')
+    add_flow_arguments(predict, tunnel=False)
+    predict.set_defaults(func=cmd_predict)
+
+    optimize = commands.add_parser("optimize", help="minimize drag over orientation and scale")
+    optimize.add_argument("model", help="STL file")
+    add_flow_arguments(optimize, tunnel=False, orientation=False, several=False)
+    optimize.add_argument("--params", nargs="+", default=["yaw", "pitch"],
+                          choices=["yaw", "pitch", "roll", "scale_x", "scale_y", "scale_z"])
+    optimize.add_argument("--free-volume", action="store_true",
+                          help="let the scales change the object's volume")
+    optimize.add_argument("--max-iter", type=int, default=200)
+    optimize.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    optimize.set_defaults(func=cmd_optimize)
+
+    validate = commands.add_parser("validate", help="compare solver drag with reference cases")
+    validate.add_argument("--cases", nargs="+", choices=["sphere", "flat_plate", "cube", "cylinder"])
+    validate.add_argument("--resolutions", nargs="+", default=["coarse", "medium", "fine"],
+                          help="coarse, medium, fine or an angular resolution")
+    validate.add_argument("--out", help="JSON results file")
+    validate.set_defaults(func=cmd_validate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
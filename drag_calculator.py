@@ -5,15 +5,39 @@ from pyvistaqt import BackgroundPlotter
 import numpy as np
 import json
 import csv
+import os
 import matplotlib.pyplot as plt
 from ttkthemes import ThemedTk
+import atmosphere
+import optimization
+import profiling
+import results_io
+import simulation
+import visualization
+from cache import MemoryAccountant, ResultCache, StageGraph, mesh_hash, transform_key
+from results_store import ResultsStore
+from surrogate import DragSurrogate
 
 class WindTunnelApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Virtual Wind Tunnel")
         self.config_filename = "wind_tunnel_config.json"
+        self.results_filename = "wind_tunnel_results.db"
+        self.results_store = None
         self.range_data = None
+        self.last_result = None
+        self.orientation_data = None
+        self.ride_height_data = None
+        self.drag_surrogate = None  # (geometry key, surrogate) from the last orientation sweep
+        self.result_cache = ResultCache()
+        self.memory = MemoryAccountant(2048 * 1024 ** 2, self.result_cache)
+        self.profile_filename = "wind_tunnel_profile.jsonl"
+        self.profiler = profiling.StageProfiler(log_path=self.profile_filename)
+        # Timed before the UI binds them to buttons
+        for name in ('load_stl', 'run_simulation', 'visualize_pressure', 'visualize_streamlines',
+                     'visualize_tunnel_pressure'):
+            setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
         self.setup_main_window()
         self.setup_ui_columns()
         self.setup_physics()
@@ -21,9 +45,13 @@ class WindTunnelApp:
         # New visualization states
         self.streamlines = None
         self.pressure_volume = None
+        self.pressure_actor = None
+        self.slice_plane = None
+        self.slice_axis = None
         self.turbulence_active = False
 
         self.setup_visualization()
+        self.setup_memory_tracking()
 
     def setup_main_window(self):
         self.root.geometry("1400x900")
@@ -45,21 +73,15 @@ class WindTunnelApp:
         self.plotter.set_background('white')
         self.add_wind_direction_indicator()
         self.draw_tunnel()
-        self.plotter.camera_position = 'yz'
-        self.plotter.camera.azimuth = 30
-        self.plotter.camera.elevation = 30
+        self.plotter.camera_position, self.plotter.camera.azimuth, self.plotter.camera.elevation = \
+            visualization.DEFAULT_CAMERA
 
     def draw_tunnel(self):
         length = self.tunnel_vars['length'].get() if hasattr(self, 'tunnel_vars') else 20
         width = self.tunnel_vars['width'].get() if hasattr(self, 'tunnel_vars') else 10
         height = self.tunnel_vars['height'].get() if hasattr(self, 'tunnel_vars') else 10
 
-        # Create the tunnel as a tube
-        tunnel_length = length - width/2 * 2
-        pointa = np.array([0, 0, height/2])
-        pointb = np.array([tunnel_length, 0, height/2])
-        tube = pv.Cylinder(center=(tunnel_length/2, 0, height/2), direction=(1, 0, 0), radius=width/4, height=tunnel_length)
-
+        tube = visualization.tunnel_mesh((length, width, height))
         self.plotter.add_mesh(tube, color="#00BFFF", opacity=0.3,
                               style='surface', line_width=2, name='tunnel')
 
@@ -88,22 +110,26 @@ class WindTunnelApp:
         ttk.Label(sim_frame_left, text="Height").grid(row=3, column=0, sticky="w")
         ttk.Entry(sim_frame_left, textvariable=self.tunnel_vars['height'], width=10).grid(row=3, column=1)
         ttk.Button(sim_frame_left, text="Apply Tunnel Dimensions", command=self.update_tunnel_dimensions).grid(row=4, column=0, columnspan=2, pady=5)
+        self.blockage_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(sim_frame_left, text="Blockage Correction", variable=self.blockage_var).grid(row=5, column=0, columnspan=2, sticky="w")
 
-        ttk.Label(sim_frame_left, text="Flow Parameters:").grid(row=5, column=0, sticky="w", pady=(10,0))
+        ttk.Label(sim_frame_left, text="Flow Parameters:").grid(row=6, column=0, sticky="w", pady=(10,0))
         self.flow_vars = {
             'velocity': tk.DoubleVar(value=20),
             'density': tk.DoubleVar(value=1.225),
             'viscosity': tk.DoubleVar(value=1.8e-5)
         }
-        ttk.Label(sim_frame_left, text="Velocity").grid(row=6, column=0, sticky="w")
-        ttk.Entry(sim_frame_left, textvariable=self.flow_vars['velocity'], width=10).grid(row=6, column=1)
-        ttk.Label(sim_frame_left, text="Density").grid(row=7, column=0, sticky="w")
-        ttk.Entry(sim_frame_left, textvariable=self.flow_vars['density'], width=10).grid(row=7, column=1)
-        ttk.Label(sim_frame_left, text="Viscosity").grid(row=8, column=0, sticky="w")
-        ttk.Entry(sim_frame_left, textvariable=self.flow_vars['viscosity'], width=10).grid(row=8, column=1)
-        ttk.Button(sim_frame_left, text="Load STL", command=self.load_stl).grid(row=9, column=0, columnspan=2, pady=5)
-        ttk.Button(sim_frame_left, text="Run Simulation", command=self.run_simulation).grid(row=10, column=0, columnspan=2)
-        ttk.Button(sim_frame_left, text="Visualize Pressure", command=self.visualize_tunnel_pressure).grid(row=11, column=0, columnspan=2, pady=5)
+        ttk.Label(sim_frame_left, text="Velocity").grid(row=7, column=0, sticky="w")
+        ttk.Entry(sim_frame_left, textvariable=self.flow_vars['velocity'], width=10).grid(row=7, column=1)
+        ttk.Label(sim_frame_left, text="Density").grid(row=8, column=0, sticky="w")
+        ttk.Entry(sim_frame_left, textvariable=self.flow_vars['density'], width=10).grid(row=8, column=1)
+        ttk.Label(sim_frame_left, text="Viscosity").grid(row=9, column=0, sticky="w")
+        ttk.Entry(sim_frame_left, textvariable=self.flow_vars['viscosity'], width=10).grid(row=9, column=1)
+        ttk.Button(sim_frame_left, text="Load STL", command=self.load_stl).grid(row=10, column=0, columnspan=2, pady=5)
+        ttk.Button(sim_frame_left, text="Run Simulation", command=self.run_simulation).grid(row=11, column=0, columnspan=2)
+        ttk.Button(sim_frame_left, text="Visualize Pressure", command=self.visualize_tunnel_pressure).grid(row=12, column=0, columnspan=2, pady=5)
+        ttk.Button(sim_frame_left, text="Export Results", command=self.export_single_data).grid(row=13, column=0, columnspan=2)
+        ttk.Button(sim_frame_left, text="Export Fields", command=self.export_fields).grid(row=14, column=0, columnspan=2, pady=5)
 
         # Object Position Controls
         obj_ctrl_frame = ttk.LabelFrame(self.left_panel, text="Object Position Controls")
@@ -143,40 +169,368 @@ class WindTunnelApp:
         ttk.Label(analysis_frame, text="Step (m/s):").grid(row=2, column=0, sticky="w")
         self.vel_step_var = tk.StringVar(value="0.1")
         ttk.Entry(analysis_frame, textvariable=self.vel_step_var, width=10).grid(row=2, column=1)
-        ttk.Button(analysis_frame, text="Run Range Analysis", command=self.run_range_analysis).grid(row=3, column=0, columnspan=2, pady=5)
-        ttk.Button(analysis_frame, text="Export Range Data", command=self.export_range_data).grid(row=4, column=0, columnspan=2, pady=5)
+        # Adaptive sampling treats the step as the finest spacing allowed
+        self.adaptive_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(analysis_frame, text="Adaptive", variable=self.adaptive_var).grid(row=3, column=0, sticky="w")
+        ttk.Label(analysis_frame, text="Max Points:").grid(row=4, column=0, sticky="w")
+        self.vel_budget_var = tk.StringVar(value="25")
+        ttk.Entry(analysis_frame, textvariable=self.vel_budget_var, width=10).grid(row=4, column=1)
+        # Selects the Cd(Re) table used for the range curve
+        ttk.Label(analysis_frame, text="Shape Class:").grid(row=5, column=0, sticky="w")
+        self.shape_class_var = tk.StringVar(value="car")
+        ttk.Combobox(analysis_frame, textvariable=self.shape_class_var, values=simulation.SHAPE_CLASSES,
+                     width=10, state="readonly").grid(row=5, column=1)
+        # Optional atmosphere sweep axes, e.g. "0, 1000, 2000" or "0:3000:500";
+        # left empty, the density and viscosity entries are used
+        ttk.Label(analysis_frame, text="Altitudes (m):").grid(row=6, column=0, sticky="w")
+        self.altitude_var = tk.StringVar(value="")
+        ttk.Entry(analysis_frame, textvariable=self.altitude_var, width=10).grid(row=6, column=1)
+        ttk.Label(analysis_frame, text="ISA ΔT (K):").grid(row=7, column=0, sticky="w")
+        self.temperature_offset_var = tk.StringVar(value="0")
+        ttk.Entry(analysis_frame, textvariable=self.temperature_offset_var, width=10).grid(row=7, column=1)
+        ttk.Button(analysis_frame, text="Run Range Analysis", command=self.run_range_analysis).grid(row=8, column=0, columnspan=2, pady=5)
+        ttk.Button(analysis_frame, text="Export Range Data", command=self.export_range_data).grid(row=9, column=0, columnspan=2, pady=5)
+        ttk.Button(analysis_frame, text="Export Sweep Animation", command=lambda: self.export_animation('velocity')).grid(row=10, column=0, columnspan=2, pady=5)
+
+        # --------------
+        # RIGHT PANEL
+        # --------------
+        # Orientation Sweep
+        sweep_frame = ttk.LabelFrame(self.right_panel, text="Orientation Sweep")
+        sweep_frame.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
+        self.yaw_vars = {
+            'start': tk.StringVar(value="0.0"),
+            'end': tk.StringVar(value="359.0"),
+            'step': tk.StringVar(value="1.0")
+        }
+        self.pitch_vars = {
+            'start': tk.StringVar(value="0.0"),
+            'end': tk.StringVar(value="0.0"),
+            'step': tk.StringVar(value="5.0")
+        }
+        ttk.Label(sweep_frame, text="").grid(row=0, column=0)
+        ttk.Label(sweep_frame, text="Yaw (°)").grid(row=0, column=1)
+        ttk.Label(sweep_frame, text="Pitch (°)").grid(row=0, column=2)
+        for i, key in enumerate(['start', 'end', 'step']):
+            ttk.Label(sweep_frame, text=key.capitalize()).grid(row=1+i, column=0, sticky="w")
+            ttk.Entry(sweep_frame, textvariable=self.yaw_vars[key], width=8).grid(row=1+i, column=1)
+            ttk.Entry(sweep_frame, textvariable=self.pitch_vars[key], width=8).grid(row=1+i, column=2)
+        ttk.Button(sweep_frame, text="Run Orientation Sweep", command=self.run_orientation_sweep).grid(row=4, column=0, columnspan=3, pady=5)
+        ttk.Button(sweep_frame, text="Export Sweep Animation", command=lambda: self.export_animation('orientation')).grid(row=5, column=0, columnspan=3, pady=5)
+        self.estimate_vars = {'yaw': tk.StringVar(value="0.0"), 'pitch': tk.StringVar(value="0.0")}
+        ttk.Label(sweep_frame, text="Estimate").grid(row=6, column=0, sticky="w")
+        ttk.Entry(sweep_frame, textvariable=self.estimate_vars['yaw'], width=8).grid(row=6, column=1)
+        ttk.Entry(sweep_frame, textvariable=self.estimate_vars['pitch'], width=8).grid(row=6, column=2)
+        ttk.Button(sweep_frame, text="Estimate Drag from Sweep", command=self.estimate_drag).grid(row=7, column=0, columnspan=3, pady=5)
+
+        # Flow Probe
+        probe_frame = ttk.LabelFrame(self.right_panel, text="Flow Probe")
+        probe_frame.grid(row=1, column=0, sticky="ew", padx=5, pady=5)
+        ttk.Label(probe_frame, text="Slice Axis:").grid(row=0, column=0, sticky="w")
+        self.slice_axis_var = tk.StringVar(value="x")
+        axis_box = ttk.Combobox(probe_frame, textvariable=self.slice_axis_var, values=["x", "y", "z"],
+                                width=5, state="readonly")
+        axis_box.grid(row=0, column=1, columnspan=2, sticky="w")
+        axis_box.bind("<<ComboboxSelected>>", lambda _: self.update_slice_plane())
+        self.slice_pos_var = tk.DoubleVar(value=0.5)
+        ttk.Scale(probe_frame, from_=0.0, to=1.0, variable=self.slice_pos_var,
+                  command=lambda _: self.update_slice_plane()).grid(row=1, column=0, columnspan=3, sticky="ew")
+        ttk.Label(probe_frame, text="Probe Point (m):").grid(row=2, column=0, columnspan=3, sticky="w")
+        self.probe_vars = [tk.DoubleVar(value=v) for v in (-2.0, 0.0, 1.0)]
+        for i, var in enumerate(self.probe_vars):
+            ttk.Entry(probe_frame, textvariable=var, width=6).grid(row=3, column=i)
+        ttk.Button(probe_frame, text="Probe", command=self.probe_point).grid(row=4, column=0, columnspan=3, pady=5)
+
+        # Object Transform
+        transform_frame = ttk.LabelFrame(self.right_panel, text="Object Transform")
+        transform_frame.grid(row=2, column=0, sticky="ew", padx=5, pady=5)
+        self.scale_vars = {
+            'scale_x': tk.DoubleVar(value=1.0),
+            'scale_y': tk.DoubleVar(value=1.0),
+            'scale_z': tk.DoubleVar(value=1.0)
+        }
+        ttk.Label(transform_frame, text="Scale XYZ:").grid(row=0, column=0, columnspan=3, sticky="w")
+        for i, key in enumerate(['scale_x', 'scale_y', 'scale_z']):
+            ttk.Entry(transform_frame, textvariable=self.scale_vars[key], width=6).grid(row=1, column=i)
+        ttk.Button(transform_frame, text="Apply Scale", command=self.scale_object).grid(row=2, column=0, columnspan=3, pady=5)
+        ttk.Label(transform_frame, text="Rotate (15° steps):").grid(row=3, column=0, columnspan=3, sticky="w")
+        for i, axis in enumerate('xyz'):
+            ttk.Button(transform_frame, text=f"{axis.upper()}-", width=4,
+                       command=lambda a=axis: self.rotate_object(a, -15)).grid(row=4, column=i, padx=2, pady=2)
+            ttk.Button(transform_frame, text=f"{axis.upper()}+", width=4,
+                       command=lambda a=axis: self.rotate_object(a, 15)).grid(row=5, column=i, padx=2, pady=2)
+
+        # Drag Optimization
+        optimize_frame = ttk.LabelFrame(self.right_panel, text="Drag Optimization")
+        optimize_frame.grid(row=3, column=0, sticky="ew", padx=5, pady=5)
+        self.optimize_vars = {
+            'orientation': tk.BooleanVar(value=True),
+            'shape': tk.BooleanVar(value=False)
+        }
+        ttk.Checkbutton(optimize_frame, text="Yaw / Pitch", variable=self.optimize_vars['orientation']).grid(row=0, column=0, sticky="w")
+        ttk.Checkbutton(optimize_frame, text="Scale (fixed volume)", variable=self.optimize_vars['shape']).grid(row=1, column=0, sticky="w")
+        ttk.Button(optimize_frame, text="Minimize Drag", command=self.optimize_drag).grid(row=2, column=0, pady=5)
+
+        # Ground Effect
+        ground_frame = ttk.LabelFrame(self.right_panel, text="Ground Effect")
+        ground_frame.grid(row=4, column=0, sticky="ew", padx=5, pady=5)
+        self.ground_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(ground_frame, text="Moving Ground", variable=self.ground_var,
+                        command=self.toggle_ground).grid(row=0, column=0, columnspan=2, sticky="w")
+        self.ride_height_vars = {
+            'start': tk.StringVar(value="0.0"),
+            'end': tk.StringVar(value="200.0"),
+            'step': tk.StringVar(value="10.0")
+        }
+        for i, key in enumerate(['start', 'end', 'step']):
+            ttk.Label(ground_frame, text=f"Ride Height {key.capitalize()} (mm)").grid(row=1+i, column=0, sticky="w")
+            ttk.Entry(ground_frame, textvariable=self.ride_height_vars[key], width=8).grid(row=1+i, column=1)
+        ttk.Button(ground_frame, text="Run Ride Height Sweep", command=self.run_ride_height_sweep).grid(row=4, column=0, columnspan=2, pady=5)
+
+        # Moment Reference
+        moment_frame = ttk.LabelFrame(self.right_panel, text="Moment Reference")
+        moment_frame.grid(row=5, column=0, sticky="ew", padx=5, pady=5)
+        self.custom_reference_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(moment_frame, text="Custom Point (else object position)",
+                        variable=self.custom_reference_var).grid(row=0, column=0, columnspan=3, sticky="w")
+        self.reference_vars = {
+            'x': tk.DoubleVar(value=0.0),
+            'y': tk.DoubleVar(value=0.0),
+            'z': tk.DoubleVar(value=0.0)
+        }
+        for i, key in enumerate(['x', 'y', 'z']):
+            ttk.Label(moment_frame, text=key.upper()).grid(row=1, column=i)
+            ttk.Entry(moment_frame, textvariable=self.reference_vars[key], width=6).grid(row=2, column=i)
 
         # A variable to show messages in the left panel if needed
         self.result_var = tk.StringVar()
-        ttk.Label(sim_frame_left, textvariable=self.result_var, wraplength=250).grid(row=12, column=0, columnspan=2, pady=5)
+        ttk.Label(sim_frame_left, textvariable=self.result_var, wraplength=250).grid(row=15, column=0, columnspan=2, pady=5)
+
+        self.setup_profile_panel()
+        self.setup_memory_panel()
+
+    def setup_memory_panel(self):
+        memory_frame = ttk.LabelFrame(self.left_panel, text="Memory")
+        memory_frame.grid(row=4, column=0, sticky="ew", padx=5, pady=5)
+        self.memory_var = tk.StringVar()
+        ttk.Label(memory_frame, textvariable=self.memory_var, wraplength=250).grid(row=0, column=0, columnspan=3, sticky="w")
+        ttk.Label(memory_frame, text="Budget (MB):").grid(row=1, column=0, sticky="w")
+        self.memory_budget_var = tk.StringVar(value="2048")
+        ttk.Entry(memory_frame, textvariable=self.memory_budget_var, width=8).grid(row=1, column=1)
+        ttk.Button(memory_frame, text="Apply", command=self.apply_memory_budget).grid(row=1, column=2)
+
+    def setup_profile_panel(self):
+        # Collapsible per-stage timings, filled as profiled calls finish
+        profile_frame = ttk.Frame(self.left_panel)
+        profile_frame.grid(row=3, column=0, sticky="ew", padx=5, pady=5)
+        self.profile_toggle = ttk.Button(profile_frame, text="▸ Profiling", command=self.toggle_profile_panel)
+        self.profile_toggle.grid(row=0, column=0, sticky="w")
+        self.profile_body = ttk.Frame(profile_frame)
+        self.profile_tree = ttk.Treeview(self.profile_body, columns=("wall", "cpu", "peak"), height=8)
+        for column, text, width in (("#0", "Stage", 150), ("wall", "Wall ms", 60),
+                                    ("cpu", "CPU ms", 60), ("peak", "Peak MB", 60)):
+            self.profile_tree.heading(column, text=text)
+            self.profile_tree.column(column, width=width, anchor="w" if column == "#0" else "e")
+        self.profile_tree.grid(row=0, column=0, columnspan=3, sticky="ew")
+        ttk.Label(self.profile_body, text="Capture:").grid(row=1, column=0, sticky="w")
+        self.capture_var = tk.StringVar(value="Off")
+        capture_box = ttk.Combobox(self.profile_body, textvariable=self.capture_var,
+                                   values=["Off"] + profiling.CAPTURE_BACKENDS, width=12, state="readonly")
+        capture_box.grid(row=1, column=1, sticky="w")
+        capture_box.bind("<<ComboboxSelected>>", lambda _: self.set_capture_backend())
+        ttk.Button(self.profile_body, text="Clear", command=self.clear_profile).grid(row=1, column=2)
+        self.pending_profile = []
+        self.profiler.listeners.append(self.show_profile_record)
+
+    def toggle_profile_panel(self):
+        if self.profile_body.winfo_ismapped():
+            self.profile_body.grid_remove()
+            self.profile_toggle.config(text="▸ Profiling")
+        else:
+            self.profile_body.grid(row=1, column=0, sticky="ew")
+            self.profile_toggle.config(text="▾ Profiling")
+
+    def set_capture_backend(self):
+        backend = self.capture_var.get()
+        self.profiler.capture_backend = None if backend == "Off" else backend
+
+    def clear_profile(self):
+        self.profile_tree.delete(*self.profile_tree.get_children())
+
+    def show_profile_record(self, record):
+        # Inner stages finish first; they are held until their top-level
+        # call completes and then inserted beneath it
+        self.pending_profile.append(record)
+        if record["depth"] > 0:
+            return
+        items = {}
+        for r in sorted(self.pending_profile, key=lambda r: r["depth"]):
+            parent = items.get(r["stage"].rpartition("/")[0], "")
+            items[r["stage"]] = self.profile_tree.insert(
+                parent, 0 if not parent else "end", text=r["stage"].rpartition("/")[2],
+                values=(f"{r['wall_s'] * 1e3:.1f}", f"{r['cpu_s'] * 1e3:.1f}", f"{r['peak_bytes'] / 1e6:.1f}")
+            )
+        self.pending_profile = []
+        # Keep the most recent calls only
+        for item in self.profile_tree.get_children()[20:]:
+            self.profile_tree.delete(item)
+
+    def setup_memory_tracking(self):
+        self.memory.track('model', lambda: self.current_stl)
+        self.memory.track('original model', lambda: self.original_stl)
+        self.memory.track('pressure volume', lambda: self.pressure_volume)
+        self.memory.track('slice plane', lambda: self.slice_plane)
+        self.memory.track('streamlines', lambda: self.streamlines)
+        self.memory.track('range data', lambda: self.range_data)
+        self.memory.track('orientation data', lambda: self.orientation_data)
+        # Current stage results stay alive after their cache entries are evicted
+        self.memory.track('stage results', lambda: [value for _, value in self.stages.values.values()])
+        self.memory.add_reducer('pressure grid', self.downsample_pressure_grid)
+        self.profiler.listeners.append(self.after_profiled_call)
+        self.refresh_memory()
+
+    def after_profiled_call(self, record):
+        # Budget checks follow every top-level action
+        if record["depth"] == 0:
+            self.check_memory()
+
+    def apply_memory_budget(self):
+        try:
+            self.memory.budget_bytes = float(self.memory_budget_var.get()) * 1024 ** 2
+            self.check_memory()
+        except ValueError:
+            self.result_var.set("Invalid memory budget.")
+
+    def check_memory(self):
+        actions = self.memory.enforce()
+        if actions:
+            self.result_var.set(f"Memory budget exceeded; reduced: {', '.join(actions)}")
+        self.show_memory_usage()
+
+    def refresh_memory(self):
+        self.show_memory_usage()
+        self.root.after(2000, self.refresh_memory)
+
+    def show_memory_usage(self):
+        usage = self.memory.usage()
+        largest = sorted(((v, k) for k, v in usage.items() if v > 0), reverse=True)[:3]
+        text = f"Total: {sum(usage.values()) / 1024 ** 2:.1f} MB of {self.memory.budget_bytes / 1024 ** 2:.0f} MB"
+        for nbytes, name in largest:
+            text += f"\n  {name}: {nbytes / 1024 ** 2:.1f} MB"
+        self.memory_var.set(text)
+
+    def downsample_pressure_grid(self):
+        # Halve the flow field resolution; the volume and slice plane are
+        # rebuilt at the new size the next time they are shown
+        dims = tuple(max(8, n // 2) for n in self.grid_dims)
+        if dims == self.grid_dims:
+            return False
+        self.grid_dims = dims
+        shown = self.pressure_volume is not None
+        self.pressure_volume = None
+        self.slice_plane = None
+        self.slice_axis = None
+        if shown:
+            self.plotter.remove_actor('tunnel_pressure')
+            self.pressure_actor = None
+            self.visualize_tunnel_pressure()
+        else:
+            self.stages.invalidate('flow_field')
+            self.stages.invalidate('unit_pressure')
+        return True
 
     def setup_physics(self):
-        self.drag_coefficient = 0.3
         self.object_position = [0, 0, 0]
         self.current_stl = None
+        self.model_name = None
         self.original_stl = None  # to store the original mesh for reset
+        self.source_hash = None  # content hash of original_stl
+        self.object_transform = np.eye(4)  # current_stl relative to original_stl
+        self.grid_dims = visualization.PRESSURE_GRID_DIMS  # lowered when memory runs short
+        self.setup_stages()
+
+    def setup_stages(self):
+        # geometry -> area -> flow field -> forces -> visuals. Velocity and
+        # density only enter through 'q', so changing them re-runs the cheap
+        # scaling stages and leaves every geometric stage untouched.
+        self.stages = StageGraph(self.result_cache, self.profiler)
+        self.stages.add_stage('geometry', ['mesh'], simulation.cell_geometry)
+        # One reference area for every coefficient, the Reynolds number and
+        # the blockage ratio: the windward panels projected along the wind
+        self.stages.add_stage('area', ['mesh', 'geometry'], lambda mesh, geometry: {
+            "frontal_area": float(simulation.projected_area(geometry[1])),
+            "surface_area": mesh.area
+        })
+        self.stages.add_stage('cp', ['geometry', 'body', 'ground'], self.compute_cp)
+        # Pressure forces are linear in q, so integrate once at q = 1
+        self.stages.add_stage('unit_loads', ['geometry', 'cp', 'reference_point'],
+                              lambda geometry, cp, reference_point: simulation.integrate_forces(
+                                  geometry[0], geometry[1], cp, 1.0, geometry[2], reference_point=reference_point))
+        self.stages.add_stage('q', ['velocity', 'density'], simulation.dynamic_pressure)
+        # Cached per tunnel configuration; the blockage ratio follows the
+        # projected area of the current geometry
+        self.stages.add_stage('cross_section', ['tunnel'], simulation.tunnel_cross_section)
+        self.stages.add_stage('blockage', ['area', 'cross_section'],
+                              lambda area, cross_section: float(simulation.blockage_ratio(
+                                  area["frontal_area"], cross_section)))
+        self.stages.add_stage('loads', ['unit_loads', 'q', 'blockage', 'blockage_correction'], self.scale_loads)
+        self.stages.add_stage('flow_grid', ['tunnel'], visualization.build_flow_grid)
+        self.stages.add_stage('streamlines', ['flow_grid', 'tunnel'], visualization.trace_streamlines)
+        self.stages.add_stage('body', ['mesh'],
+                              lambda mesh: None if mesh is None else simulation.equivalent_body(mesh.bounds))
+        self.stages.add_stage('pressure_grid', ['tunnel', 'grid_dims'],
+                              lambda tunnel, grid_dims: visualization.pressure_grid_geometry(tunnel, grid_dims))
+        self.stages.add_stage('flow_field', ['pressure_grid', 'body', 'grid_dims', 'ground'], self.compute_flow_field)
+        # Pressure at q = 1 on the volume points; scaled into the live volume in place
+        self.stages.add_stage('unit_pressure', ['flow_field'], lambda flow_field: flow_field["cp"])
+
+    def update_stage_inputs(self):
+        if self.current_stl is not None:
+            self.stages.set_param('mesh', self.current_stl, key=self.get_mesh_key())
+        else:
+            self.stages.set_param('mesh', None)
+        self.stages.set_param('reference_point', self.moment_reference())
+        self.stages.set_param('tunnel', self.tunnel_key())
+        self.stages.set_param('grid_dims', self.grid_dims)
+        self.stages.set_param('ground', self.ground_var.get())
+        self.stages.set_param('blockage_correction', self.blockage_var.get())
+        self.stages.set_param('velocity', self.flow_vars['velocity'].get())
+        self.stages.set_param('density', self.flow_vars['density'].get())
+
+    def moment_reference(self):
+        if self.custom_reference_var.get():
+            return tuple(self.reference_vars[k].get() for k in ('x', 'y', 'z'))
+        return tuple(float(v) for v in self.object_position)
+
+    def apply_transform(self, matrix):
+        self.object_transform = matrix @ self.object_transform
+
+    def get_mesh_key(self):
+        return (self.source_hash, transform_key(self.object_transform))
+
+    def get_cell_geometry(self):
+        self.update_stage_inputs()
+        return self.stages.get('geometry')
+
+    def tunnel_key(self):
+        return tuple(self.tunnel_vars[k].get() for k in ('length', 'width', 'height'))
 
     def update_tunnel_dimensions(self):
         try:
             self.plotter.remove_actor('tunnel')
-            if self.pressure_volume:
-                self.plotter.remove_actor('tunnel_pressure')
-                self.pressure_volume = None
             self.draw_tunnel()
+            if self.pressure_volume is not None:
+                # The persistent volume follows the new tunnel box
+                self.visualize_tunnel_pressure()
             self.plotter.render()
         except Exception as e:
             self.result_var.set(f"Error updating tunnel: {str(e)}")
 
     def center_and_place_object(self):
         if self.current_stl:
-            bounds = self.current_stl.bounds
-            # Center the object and place it at the tunnel entrance
-            self.current_stl.translate([
-                -(bounds[0] + bounds[1]) / 2,  # Center X
-                -(bounds[2] + bounds[3]) / 2,  # Center Y
-                -bounds[4]  # Place at bottom
-            ], inplace=True)
+            simulation.place_on_floor(self.current_stl)
             self.object_position = [0, 0, 0]
+            self.object_transform = np.eye(4)
 
     def reset_object_position(self):
         if self.current_stl and self.original_stl:
@@ -212,6 +566,9 @@ class WindTunnelApp:
             # Apply movement
             self.current_stl.translate([x, y, z], inplace=True)
             self.object_position = new_pos
+            translation = np.eye(4)
+            translation[:3, 3] = [x, y, z]
+            self.apply_transform(translation)
 
             # Update visualization
             self.plotter.remove_actor('object')
@@ -221,11 +578,16 @@ class WindTunnelApp:
     def load_stl(self):
         file_path = filedialog.askopenfilename(filetypes=[("STL Files", "*.stl")])
         if file_path:
-            self.current_stl = pv.read(file_path)
-            self.current_stl = self.current_stl.compute_normals(auto_orient_normals=True)
+            with self.profiler.stage('read'):
+                mesh = pv.read(file_path)
+            with self.profiler.stage('prepare_mesh'):
+                self.current_stl = simulation.prepare_mesh(mesh)
             self.center_and_place_object()
             # Save a copy for reset purposes
             self.original_stl = self.current_stl.copy()
+            with self.profiler.stage('mesh_hash'):
+                self.source_hash = mesh_hash(self.original_stl)
+            self.model_name = os.path.basename(file_path)
             self.plotter.add_mesh(self.current_stl, color='lightgray', name='object')
             self.plotter.reset_camera()
             self.plotter.render()
@@ -242,18 +604,24 @@ class WindTunnelApp:
             sy = safe_get(self.scale_vars['scale_y'])
             sz = safe_get(self.scale_vars['scale_z'])
             self.current_stl.scale([sx, sy, sz], inplace=True)
+            self.apply_transform(np.diag([sx, sy, sz, 1.0]))
             self.plotter.render()
         else:
             self.result_var.set("No STL object loaded to scale.")
 
     def rotate_object(self, axis, angle):
         if self.current_stl:
+            rotation = np.eye(4)
             if axis.lower() == 'x':
                 self.current_stl.rotate_x(angle, point=(0, 0, 0), inplace=True)
+                rotation[:3, :3] = simulation.rotation_matrix('x', angle)
             elif axis.lower() == 'y':
                 self.current_stl.rotate_y(angle, point=(0, 0, 0), inplace=True)
+                rotation[:3, :3] = simulation.rotation_matrix('y', angle)
             elif axis.lower() == 'z':
                 self.current_stl.rotate_z(angle, point=(0, 0, 0), inplace=True)
+                rotation[:3, :3] = simulation.rotation_matrix('z', angle)
+            self.apply_transform(rotation)
             self.plotter.render()
 
     def set_camera_view(self, position):
@@ -273,135 +641,243 @@ class WindTunnelApp:
             velocity = self.flow_vars['velocity'].get()
             density = self.flow_vars['density'].get()
 
-            if not hasattr(self, 'current_stl'):
+            if self.current_stl is None:
                 raise ValueError("No STL object loaded.")
 
-            bounds = self.current_stl.bounds
-            frontal_area = (bounds[3] - bounds[2]) * (bounds[5] - bounds[4])
-
-            # Calculate drag force based on the surface area
-            normal_vectors = self.current_stl.point_data["Normals"]
-            wind_vector = np.array([1, 0, 0])
-            dot_product = np.sum(normal_vectors * wind_vector, axis=1)
-            pressure_coefficient = 2 * (1 - dot_product) / dot_product
-
-            # Use surface area instead of frontal area
-            drag_coefficient = 0.3
-            object_surface_area = self.current_stl.area
-            drag_force = 0.5 * density * (velocity ** 2) * pressure_coefficient * object_surface_area * drag_coefficient
+            # Integrate panel pressures over the surface, per part and in total
+            self.update_stage_inputs()
+            self.current_stl.cell_data["Cp"] = self.stages.get('cp')
+            loads = self.stages.get('loads')
+            area = self.stages.get('area')
+            drag_force = loads["force"] @ simulation.WIND_VECTOR
+            part_drag = loads["part_forces"] @ simulation.WIND_VECTOR
 
+            object_surface_area = area["surface_area"]
             power = drag_force * velocity
-            self.result_var.set(
+            reynolds = simulation.reynolds_number(density, velocity, self.flow_vars['viscosity'].get(),
+                                                  np.sqrt(area["frontal_area"]))
+            blockage = self.stages.get('blockage')
+            reference_point = np.array(self.moment_reference())
+            center_of_pressure = simulation.center_of_pressure(loads["force"], loads["moment"], reference_point)
+            # Coefficients on the projected frontal area S and L = √S, as for the Reynolds number
+            coefficient_args = (self.stages.get('q'), area["frontal_area"], np.sqrt(area["frontal_area"]))
+            coefficients = simulation.aero_coefficients(loads["force"], loads["moment"], *coefficient_args)
+            self.last_result = {
+                "velocity": velocity,
+                "density": density,
+                "reynolds": reynolds,
+                "blockage_ratio": blockage,
+                "blockage_correction": float(self.blockage_factor(blockage)),
+                "drag_force_N": drag_force,
+                "power_W": power,
+                "frontal_area": area["frontal_area"],
+                "surface_area": object_surface_area,
+                "force_N": loads["force"],
+                "moment_Nm": loads["moment"],
+                "part_forces_N": loads["part_forces"],
+                "part_moments_Nm": loads["part_moments"],
+                "reference_point": reference_point,
+                "center_of_pressure": center_of_pressure,
+                "coefficients": coefficients,
+                "part_centers_of_pressure": simulation.center_of_pressure(
+                    loads["part_forces"], loads["part_moments"], reference_point),
+                "part_coefficients": simulation.aero_coefficients(
+                    loads["part_forces"], loads["part_moments"], *coefficient_args)
+            }
+
+            result_text = (
                 f"Drag Force: {drag_force:.2f} N\n"
                 f"Power: {power:.2f} W\n"
                 f"Velocity: {velocity} m/s\n"
+                f"Reynolds Number: {reynolds:.3g}\n"
+                f"Blockage Ratio: {blockage:.2%}"
+                f"{' (corrected)' if self.blockage_var.get() else ''}\n"
+                f"Side / Lift: {loads['force'][1]:.2f} / {loads['force'][2]:.2f} N\n"
+                f"Roll / Pitch / Yaw: {loads['moment'][0]:.2f} / {loads['moment'][1]:.2f} / "
+                f"{loads['moment'][2]:.2f} Nm\n"
+                f"Centre of Pressure: ({center_of_pressure[0]:.3f}, {center_of_pressure[1]:.3f}, "
+                f"{center_of_pressure[2]:.3f}) m\n"
+                f"Coefficients (S = {area['frontal_area']:.3f} m² projected, L = √S):\n"
+                + "  ".join(f"{name} {c:.3f}" for name, c in zip(simulation.COEFFICIENT_NAMES, coefficients)) + "\n"
                 f"Surface Area: {object_surface_area:.2f} m²"
             )
-
-            # Update additional visualizations for simulation
-            self.visualize_pressure()
-            self.visualize_streamlines()
-            self.visualize_tunnel_pressure()
+            if len(part_drag) > 1:
+                # List the largest contributors first
+                order = np.argsort(-np.abs(part_drag))
+                result_text += "\nDrag by part:"
+                for i in order[:8]:
+                    result_text += f"\n  Part {i}: {part_drag[i]:.2f} N"
+                if len(order) > 8:
+                    result_text += f"\n  ... {len(order) - 8} more parts"
+            self.record_result(self.last_result)
+
+            # Update additional visualizations for simulation. Each reports
+            # its status through result_var, so the results text goes last
+            # and only visualization errors are kept below it.
+            for visualize in (self.visualize_pressure, self.visualize_streamlines, self.visualize_tunnel_pressure):
+                self.result_var.set("")
+                visualize()
+                status = self.result_var.get()
+                if "error" in status.lower():
+                    result_text += f"\n{status}"
+            self.result_var.set(result_text)
         except Exception as e:
             self.result_var.set(f"Simulation error: {str(e)}")
 
+    def record_result(self, result):
+        # Every run is appended to the results store so it can be queried later
+        if self.results_store is None:
+            self.results_store = ResultsStore(self.results_filename)
+        # Orientation and scale come from the transform actually applied; a
+        # roll or shear has no yaw/pitch/scale form and is stored as NULL
+        decomposed = simulation.decompose_transform(self.object_transform)
+        yaw, pitch, scale = decomposed if decomposed is not None else (None, None, [None] * 3)
+        config = {
+            "model": self.model_name,
+            "mesh_hash": self.source_hash,
+            "tunnel": {k: v.get() for k, v in self.tunnel_vars.items()},
+            "flow": {k: v.get() for k, v in self.flow_vars.items()},
+            "scale": {k: None if v is None else float(v) for k, v in zip(("scale_x", "scale_y", "scale_z"), scale)},
+            "object_position": list(self.object_position),
+            "transform": np.reshape(transform_key(self.object_transform), (4, 4)).tolist(),
+            "yaw": yaw,
+            "pitch": pitch,
+            "ground": self.ground_var.get(),
+            "blockage_correction": self.blockage_var.get(),
+            "reference_point": [float(v) for v in self.moment_reference()]
+        }
+        self.results_store.append(config, {
+            k: v.tolist() if isinstance(v, np.ndarray) else float(v) for k, v in result.items()
+        })
+
+    def visualize_pressure(self):
+        if self.current_stl is not None and "Cp" in self.current_stl.cell_data:
+            self.plotter.add_mesh(self.current_stl, scalars="Cp", cmap="coolwarm",
+                                  clim=[simulation.BASE_CP, simulation.STAGNATION_CP],
+                                  name='object')
+            self.plotter.render()
+
     def visualize_tunnel_pressure(self):
         try:
-            if self.pressure_volume:
-                self.plotter.remove_actor('tunnel_pressure')
-
-            length = self.tunnel_vars['length'].get()
-            width = self.tunnel_vars['width'].get()
-            height = self.tunnel_vars['height'].get()
-
-            # Create a structured grid for the tunnel volume
-            nx, ny, nz = 50, 40, 30
-            x = np.linspace(-length/2, length/2, nx)
-            y = np.linspace(-width/2, width/2, ny)
-            z = np.linspace(0, height, nz)
-            X, Y, Z = np.meshgrid(x, y, z, indexing="ij")
-            points = np.column_stack((X.ravel(), Y.ravel(), Z.ravel()))
-
-            grid = pv.StructuredGrid()
-            grid.points = points
-            grid.dimensions = (nx, ny, nz)
-
-            # Define the main flow direction and calculate pressure
-            velocity = self.flow_vars['velocity'].get()
-            density = self.flow_vars['density'].get()
-            wind_vector = np.array([1, 0, 0])
+            self.update_stage_inputs()
+            origin, spacing = self.stages.get('pressure_grid')
+            unit_field = self.stages.get('unit_pressure')
+            q = self.stages.get('q')
+
+            # The volume and its actor are created once; afterwards only the
+            # grid placement and the scalars change, both in place. add_volume
+            # renders a copy, so later updates go to the actor's dataset.
+            if self.pressure_volume is None:
+                self.pressure_volume = visualization.create_pressure_volume(origin, spacing, self.grid_dims)
+            visualization.update_pressure_volume(self.pressure_volume, origin, spacing, unit_field, q)
+            clim = visualization.scalar_limits(self.pressure_volume["pressure"])
+
+            if self.pressure_actor is None:
+                self.pressure_actor = self.plotter.add_volume(
+                    self.pressure_volume,
+                    scalars="pressure",
+                    cmap="jet",
+                    opacity=[0.0, 0.3],
+                    opacity_unit_distance=self.tunnel_vars['length'].get(),
+                    clim=clim,
+                    name='tunnel_pressure'
+                )
+                self.pressure_volume = self.pressure_actor.mapper.dataset
+            else:
+                self.pressure_actor.mapper.scalar_range = clim
+                self.pressure_actor.prop.opacity_unit_distance = self.tunnel_vars['length'].get()
 
-            pressure_field = np.zeros_like(points[:, 0]) + (0.5 * density * (velocity ** 2))
-            grid["pressure"] = pressure_field
+            self.result_var.set("Tunnel pressure visualization updated")
+            self.plotter.render()
+        except Exception as e:
+            self.result_var.set(f"Pressure volume error: {str(e)}")
 
-            # Visualize the pressure distribution
-            self.pressure_volume = grid.threshold([pressure_field.min() * 1.01, pressure_field.max()])
+    def scale_loads(self, unit_loads, q, blockage, blockage_correction):
+        factor = q * self.blockage_factor(blockage, blockage_correction)
+        return {k: v * factor for k, v in unit_loads.items()}
+
+    def blockage_factor(self, ratio, enabled=None):
+        if enabled is None:
+            enabled = self.blockage_var.get()
+        return simulation.blockage_correction(ratio) if enabled else np.ones_like(ratio, dtype=float)
+
+    def compute_cp(self, geometry, body, ground):
+        centers, area_vectors, _ = geometry
+        if ground and body is not None:
+            return simulation.ground_pressure_coefficients(centers, area_vectors, *body)
+        return simulation.pressure_coefficients(area_vectors)
+
+    def compute_flow_field(self, pressure_grid, body, grid_dims, ground):
+        points = visualization.grid_points(*pressure_grid, grid_dims)
+        if body is None:
+            velocity, cp = simulation.potential_flow(points, None, 0.0)
+        else:
+            velocity, cp = simulation.potential_flow(points, *body, ground=ground)
+        return {"velocity": velocity, "cp": cp}
 
-            self.plotter.add_mesh(
-                self.pressure_volume,
-                scalars="pressure",
-                cmap="jet",
-                opacity=0.3,
-                clim=[pressure_field.min(), pressure_field.max()],
-                name='tunnel_pressure'
-            )
+    def update_slice_plane(self):
+        try:
+            self.update_stage_inputs()
+            origin, spacing = self.stages.get('pressure_grid')
+            unit_field = self.stages.get('unit_pressure')
+            q = self.stages.get('q')
+            axis = self.slice_axis_var.get()
+            dims = self.grid_dims
+            index = int(round(self.slice_pos_var.get() * (dims['xyz'.index(axis)] - 1)))
+
+            # A new plane is only needed when the axis changes; scrubbing
+            # resamples the cached field into the existing plane
+            if self.slice_plane is None or axis != self.slice_axis:
+                self.slice_plane = visualization.create_slice_plane(axis, dims)
+                self.slice_axis = axis
+                visualization.update_slice_plane(self.slice_plane, unit_field, axis, index, origin, spacing, q, dims)
+                self.slice_actor = self.plotter.add_mesh(
+                    self.slice_plane,
+                    scalars="pressure",
+                    cmap="jet",
+                    clim=visualization.scalar_limits(q * unit_field),
+                    name='slice_plane'
+                )
+            else:
+                visualization.update_slice_plane(self.slice_plane, unit_field, axis, index, origin, spacing, q, dims)
+                self.slice_actor.mapper.scalar_range = visualization.scalar_limits(q * unit_field)
+            self.plotter.render()
+        except Exception as e:
+            self.result_var.set(f"Slice plane error: {str(e)}")
 
-            self.result_var.set("Tunnel pressure visualization updated")
+    def probe_point(self):
+        try:
+            self.update_stage_inputs()
+            point = np.array([var.get() for var in self.probe_vars])
+            origin, spacing = self.stages.get('pressure_grid')
+            flow_field = self.stages.get('flow_field')
+            velocity = self.flow_vars['velocity'].get() * visualization.probe_field(
+                flow_field["velocity"], point, origin, spacing, self.grid_dims)[0]
+            pressure = self.stages.get('q') * visualization.probe_field(
+                flow_field["cp"], point, origin, spacing, self.grid_dims)[0]
+
+            self.plotter.add_mesh(pv.Sphere(radius=0.1, center=point), color='black', name='probe')
             self.plotter.render()
+            self.result_var.set(
+                f"Probe at ({point[0]:.2f}, {point[1]:.2f}, {point[2]:.2f}) m\n"
+                f"Velocity: ({velocity[0]:.2f}, {velocity[1]:.2f}, {velocity[2]:.2f}) m/s\n"
+                f"Speed: {np.linalg.norm(velocity):.2f} m/s\n"
+                f"Pressure: {pressure:.2f} Pa"
+            )
         except Exception as e:
-            self.result_var.set(f"Pressure volume error: {str(e)}")
+            self.result_var.set(f"Probe error: {str(e)}")
 
     def visualize_streamlines(self):
         try:
             if self.streamlines:
                 self.plotter.remove_actor('streamlines')
 
-            # Use tunnel dimensions for the grid boundaries to cover the entire tunnel
-            length = self.tunnel_vars['length'].get() if hasattr(self, 'tunnel_vars') else 20
-            width = self.tunnel_vars['width'].get() if hasattr(self, 'tunnel_vars') else 10
-            height = self.tunnel_vars['height'].get() if hasattr(self, 'tunnel_vars') else 10
-
-            # Create a grid covering the full tunnel
-            nx, ny, nz = 30, 20, 15
-            x = np.linspace(-length/2, length/2, nx)
-            y = np.linspace(-width/2, width/2, ny)
-            z = np.linspace(0, height, nz)
-            X, Y, Z = np.meshgrid(x, y, z, indexing="ij")
-            points = np.column_stack((X.ravel(), Y.ravel(), Z.ravel()))
-            grid = pv.StructuredGrid()
-            grid.points = points
-            grid.dimensions = (nx, ny, nz)
-
-            # Define the main flow direction and add turbulence if enabled
-            velocity = self.flow_vars['velocity'].get()
-            density = self.flow_vars['density'].get()
-            wind_vector = np.array([1, 0, 0])
-
-            pressure_field = np.zeros_like(points[:, 0]) + (0.5 * density * (velocity ** 2))
-            grid["vectors"] = pressure_field[..., None] * wind_vector
-
+            self.update_stage_inputs()
             if self.turbulence_active:
-                turbulence = 0.2 * velocity * np.random.randn(vectors.shape[0], 3)
-                vectors += turbulence
-
-            # Create seed points at the tunnel inlet (front of the tunnel)
-            nx, ny = int(nx/5), int(ny/5)
-            x_start = np.linspace(-length/2, -length/4, nx)
-            y_start = np.linspace(-width/2, width/2, ny)
-            z_start = np.full_like(y_start, height / 3)  # Start at the tunnel floor
-            seed_points_array = np.column_stack((x_start[:, None].ravel(), y_start[:, None].ravel(), z_start))
-
-            source_mesh = pv.PolyData(seed_points_array)
-
-            self.streamlines = grid.streamlines(
-                vectors='vectors',
-                source=source_mesh,
-                n_points=100,
-                max_time=200,
-                integration_direction='forward',
-                initial_step_length=0.1,
-                terminal_speed=1e-5
-            )
+                # Random perturbations make every run unique, so never cache them
+                self.streamlines = visualization.trace_streamlines(self.turbulent_flow_grid(), self.tunnel_key())
+            else:
+                self.streamlines = self.stages.get('streamlines')
 
             if self.streamlines.n_points > 0:
                 self.plotter.add_mesh(
@@ -418,6 +894,14 @@ class WindTunnelApp:
         except Exception as e:
             self.result_var.set(f"Streamlines error: {str(e)}")
 
+    def turbulent_flow_grid(self):
+        velocity = self.flow_vars['velocity'].get()
+        grid = self.stages.get('flow_grid').copy(deep=False)
+        vectors = velocity * grid["vectors"]
+        vectors += 0.2 * velocity * np.random.randn(vectors.shape[0], 3)
+        grid["vectors"] = vectors
+        return grid
+
     def toggle_turbulence(self):
         self.turbulence_active = not self.turbulence_active
         status = "ON" if self.turbulence_active else "OFF"
@@ -439,47 +923,383 @@ class WindTunnelApp:
             step = float(self.vel_step_var.get())
             if step <= 0 or vs >= ve:
                 raise ValueError("Invalid velocity range or step.")
-            density = self.flow_vars['density'].get()
+            shape_class = self.shape_class_var.get()
+            self.update_stage_inputs()
             if self.current_stl:
-                bounds = self.current_stl.bounds
+                # The same projected reference area as run_simulation
+                frontal_area = self.stages.get('area')["frontal_area"]
             else:
-                bounds = [-10, 10, -5, 5, 0, 10]
-            frontal_area = (bounds[3] - bounds[2]) * (bounds[5] - bounds[4])
-            velocities = np.arange(vs, ve+step/2, step)
-            drag_forces = 0.5 * density * (velocities ** 2) * frontal_area * self.drag_coefficient
-            powers = drag_forces * velocities
-            self.range_data = {
-                "velocities": velocities.tolist(),
-                "drag_forces": drag_forces.tolist(),
-                "powers": powers.tolist()
-            }
+                frontal_area = simulation.frontal_area([-10, 10, -5, 5, 0, 10])
+            length = np.sqrt(frontal_area)
+            correction = self.blockage_factor(
+                simulation.blockage_ratio(frontal_area, self.stages.get('cross_section')))
+
+            altitudes = self.parse_values(self.altitude_var.get())
+            if altitudes:
+                # The atmosphere is evaluated once for every (altitude, ΔT) pair
+                offsets = self.parse_values(self.temperature_offset_var.get()) or [0.0]
+                altitude, offset = (a.ravel() for a in np.meshgrid(altitudes, offsets, indexing='ij'))
+                density, viscosity = atmosphere.air_properties(altitude, offset)
+            else:
+                altitude = offset = None
+                density = np.array([self.flow_vars['density'].get()])
+                viscosity = np.array([self.flow_vars['viscosity'].get()])
+
+            def solve(velocities, density, viscosity):
+                reynolds = simulation.reynolds_number(density, velocities, viscosity, length)
+                cd = simulation.drag_coefficient(reynolds, shape_class)
+                return simulation.dynamic_pressure(density, velocities) * frontal_area * cd * correction
+
+            if self.adaptive_var.get():
+                # Samples concentrate where the curve bends; the step bounds the finest spacing
+                samples = [simulation.adaptive_samples(lambda v: solve(v, rho, mu), vs, ve,
+                                                       budget=int(self.vel_budget_var.get()), min_step=step)
+                           for rho, mu in zip(density, viscosity)]
+                counts = [len(v) for v, _ in samples]
+                velocities = np.concatenate([v for v, _ in samples])
+                drag_forces = np.concatenate([f for _, f in samples])
+            else:
+                # Every condition shares the velocity grid: one broadcast evaluation
+                grid = np.arange(vs, ve+step/2, step)
+                counts = [len(grid)] * len(density)
+                velocities = np.tile(grid, len(density))
+                drag_forces = solve(grid[None, :], density[:, None], viscosity[:, None]).ravel()
+            rho, mu = np.repeat(density, counts), np.repeat(viscosity, counts)
+            reynolds = simulation.reynolds_number(rho, velocities, mu, length)
+            columns = {"reynolds": reynolds, "drag_coefficient": simulation.drag_coefficient(reynolds, shape_class)}
+            if altitude is not None:
+                columns.update(altitude=np.repeat(altitude, counts), temperature_offset=np.repeat(offset, counts),
+                               density=rho, viscosity=mu)
+            self.range_data = simulation.range_results(velocities, drag_forces, **columns)
+            data = self.range_data
             plt.figure("Drag and Power vs Velocity")
             plt.clf()
-            plt.plot(velocities, drag_forces, label="Drag Force (N)")
-            plt.plot(velocities, powers, label="Power (W)")
+            marker = "o" if self.adaptive_var.get() else None
+            if altitude is None:
+                plt.plot(data["velocity"], data["drag_force_N"], marker=marker, markersize=3, label="Drag Force (N)")
+                plt.plot(data["velocity"], data["power_W"], marker=marker, markersize=3, label="Power (W)")
+            else:
+                # One drag curve per atmospheric condition
+                for rows, h, dt in zip(np.split(data, np.cumsum(counts)[:-1]), altitude, offset):
+                    plt.plot(rows["velocity"], rows["drag_force_N"], marker=marker, markersize=3,
+                             label=f"Drag (N), {h:.0f} m, ISA{dt:+.0f} K")
             plt.xlabel("Velocity (m/s)")
             plt.ylabel("Value")
             plt.title("Velocity Range Analysis")
             plt.legend()
             plt.grid(True)
             plt.show()
-            self.result_var.set("Range analysis completed. See plot window.")
+            self.result_var.set(f"Range analysis completed with {len(data)} points. See plot window.")
         except Exception as e:
             self.result_var.set(f"Range analysis error: {str(e)}")
 
-    def export_single_data(self):
+    def parse_values(self, text):
+        # "a, b, c" or "start:end:step"; empty text gives an empty list
+        text = text.strip()
+        if not text:
+            return []
+        if ":" in text:
+            start, end, step = (float(v) for v in text.split(":"))
+            if step <= 0 or start > end:
+                raise ValueError(f"Invalid range: {text}")
+            return list(np.arange(start, end + step/2, step))
+        return [float(v) for v in text.replace(",", " ").split()]
+
+    def run_orientation_sweep(self):
         try:
+            if self.current_stl is None:
+                raise ValueError("No STL object loaded.")
+            yaws = self.parse_angle_range(self.yaw_vars)
+            pitches = self.parse_angle_range(self.pitch_vars)
             velocity = self.flow_vars['velocity'].get()
             density = self.flow_vars['density'].get()
-            bounds = self.current_stl.bounds if self.current_stl else [0]*6
-            frontal_area = (bounds[3] - bounds[2]) * (bounds[5] - bounds[4])
-            drag_force = 0.5 * density * (velocity ** 2) * frontal_area * self.drag_coefficient
-            power = drag_force * velocity
+
+            # All orientations in one batch, without touching current_stl
+            _, area_vectors, _ = self.get_cell_geometry()
+            q = simulation.dynamic_pressure(density, velocity)
+            self.orientation_data = simulation.orientation_sweep(area_vectors, yaws, pitches, q)
+            self.orientation_data["q"] = q
+            # The projected area, and with it the blockage, changes with orientation
+            ratio = simulation.blockage_ratio(self.orientation_data["frontal_area"], self.stages.get('cross_section'))
+            correction = self.blockage_factor(ratio)
+            self.orientation_data["blockage_ratio"] = ratio
+            self.orientation_data["forces"] *= correction[..., None]
+            self.orientation_data["drag_forces"] *= correction
+            self.drag_surrogate = (self.surrogate_key(),
+                                   DragSurrogate.from_sweep(self.orientation_data, self.orientation_solver(area_vectors)))
+            data = self.orientation_data
+
+            plt.figure("Drag vs Orientation")
+            plt.clf()
+            if len(pitches) == 1:
+                ax = plt.gca()
+                ax.plot(yaws, data["drag_forces"][0], label="Drag Force (N)")
+                ax.set_xlabel("Yaw (°)")
+                ax.set_ylabel("Drag Force (N)")
+                ax2 = ax.twinx()
+                ax2.plot(yaws, data["frontal_area"][0], color="tab:orange", label="Frontal Area (m²)")
+                ax2.set_ylabel("Frontal Area (m²)")
+                ax.grid(True)
+            else:
+                plt.pcolormesh(data["yaw"], data["pitch"], data["drag_forces"], shading="auto", cmap="jet")
+                plt.colorbar(label="Drag Force (N)")
+                plt.xlabel("Yaw (°)")
+                plt.ylabel("Pitch (°)")
+            plt.title(f"Orientation Sweep at {velocity} m/s")
+            plt.show()
+
+            best = np.unravel_index(np.argmin(data["drag_forces"]), data["drag_forces"].shape)
+            self.result_var.set(
+                f"Orientation sweep completed ({data['drag_forces'].size} angles).\n"
+                f"Lowest drag: {data['drag_forces'][best]:.2f} N at "
+                f"yaw {data['yaw'][best]:.1f}°, pitch {data['pitch'][best]:.1f}°"
+            )
+        except Exception as e:
+            self.result_var.set(f"Orientation sweep error: {str(e)}")
+
+    def surrogate_key(self):
+        return (self.get_mesh_key(), self.tunnel_key(), self.blockage_var.get())
+
+    def orientation_solver(self, area_vectors):
+        # Exact drag per unit q for orientations outside the sweep, with the
+        # same blockage correction as the sweep itself
+        cross_section = self.stages.get('cross_section')
+
+        def solver(batch):
+            forces, frontal = simulation.orientation_loads(area_vectors, batch["yaw"], batch["pitch"], 1.0)
+            return (forces @ simulation.WIND_VECTOR) * self.blockage_factor(
+                simulation.blockage_ratio(frontal, cross_section))
+        return solver
+
+    def estimate_drag(self):
+        try:
+            if self.drag_surrogate is None or self.drag_surrogate[0] != self.surrogate_key():
+                raise ValueError("Run an orientation sweep for the current object and tunnel first.")
+            surrogate = self.drag_surrogate[1]
+            yaw = float(self.estimate_vars['yaw'].get())
+            pitch = float(self.estimate_vars['pitch'].get())
+            velocity = self.flow_vars['velocity'].get()
+            batch = {"yaw": [yaw], "pitch": [pitch], "velocity": [velocity],
+                     "density": [self.flow_vars['density'].get()]}
+            drag, error = surrogate.predict(batch, return_error=True)
+            source = "interpolated" if surrogate.inside(surrogate.points(batch))[0] else "solved"
+            self.result_var.set(
+                f"Estimated drag at yaw {yaw:.1f}°, pitch {pitch:.1f}°, {velocity} m/s:\n"
+                f"{drag[0]:.2f} N ± {error[0]:.2f} N ({source})"
+            )
+        except Exception as e:
+            self.result_var.set(f"Estimate error: {str(e)}")
+
+    def optimize_drag(self):
+        try:
+            if self.current_stl is None:
+                raise ValueError("No STL object loaded.")
+            names = []
+            if self.optimize_vars['orientation'].get():
+                names += ["yaw", "pitch"]
+            if self.optimize_vars['shape'].get():
+                names += ["scale_x", "scale_y", "scale_z"]
+            if not names:
+                raise ValueError("Select at least one set of parameters.")
+            self.update_stage_inputs()
+            centers, area_vectors, _ = self.stages.get('geometry')
+            q = self.stages.get('q')
+            # Applied about the origin, like the rotate and scale buttons, and
+            # with the same blockage and ground terms as Run Simulation
+            cross_section = self.stages.get('cross_section') if self.blockage_var.get() else None
+            ground_points = np.asarray(self.current_stl.points, dtype=float) if self.ground_var.get() else None
+            params, drag, info = optimization.optimize_drag(centers, area_vectors, q, names,
+                                                            cross_section=cross_section,
+                                                            ground_points=ground_points)
+
+            matrix = np.eye(4)
+            matrix[:3, :3] = optimization.configuration_transform(params)
+            self.current_stl.transform(matrix, inplace=True)
+            self.apply_transform(matrix)
+            self.plotter.render()
+            settings = ", ".join(f"{k} {v:.2f}" for k, v in params.items())
+            self.result_var.set(
+                f"Drag reduced from {info['initial_drag']:.2f} N to {drag:.2f} N\n"
+                f"{settings}\n"
+                f"{info['evaluations']} evaluations in {info['iterations']} iterations"
+            )
+        except Exception as e:
+            self.result_var.set(f"Optimization error: {str(e)}")
+
+    def toggle_ground(self):
+        if self.current_stl is not None:
+            self.run_simulation()
+
+    def run_ride_height_sweep(self):
+        try:
+            if self.current_stl is None:
+                raise ValueError("No STL object loaded.")
+            heights_mm = self.parse_angle_range(self.ride_height_vars)
+            if heights_mm[0] < 0:
+                raise ValueError("Ride heights must not be negative.")
+            velocity = self.flow_vars['velocity'].get()
+
+            # Reuses the cached panel geometry; each height only moves the
+            # image of the body, measured from the current gap to the floor
+            self.update_stage_inputs()
+            centers, area_vectors, _ = self.stages.get('geometry')
+            center, radius = self.stages.get('body')
+            q = self.stages.get('q')
+            offsets = heights_mm / 1000.0 - self.current_stl.bounds[4]
+            forces = simulation.ride_height_sweep(centers, area_vectors, center, radius, offsets, q)
+            forces *= self.blockage_factor(self.stages.get('blockage'))
+            drag = forces @ simulation.WIND_VECTOR
+            downforce = -forces[:, 2]
+            gradient = len(heights_mm) > 1
+            self.ride_height_data = {
+                "ride_height_mm": heights_mm,
+                "drag_force_N": drag,
+                "downforce_N": downforce,
+                "drag_per_mm": np.gradient(drag, heights_mm) if gradient else np.zeros_like(drag),
+                "downforce_per_mm": np.gradient(downforce, heights_mm) if gradient else np.zeros_like(drag)
+            }
+            data = self.ride_height_data
+
+            plt.figure("Ride Height Sweep")
+            plt.clf()
+            ax = plt.subplot(2, 1, 1)
+            ax.plot(heights_mm, drag, label="Drag (N)")
+            ax.plot(heights_mm, downforce, label="Downforce (N)")
+            ax.set_ylabel("Force (N)")
+            ax.legend()
+            ax.grid(True)
+            ax = plt.subplot(2, 1, 2, sharex=ax)
+            ax.plot(heights_mm, data["drag_per_mm"], label="dDrag/dh (N/mm)")
+            ax.plot(heights_mm, data["downforce_per_mm"], label="dDownforce/dh (N/mm)")
+            ax.set_xlabel("Ride Height (mm)")
+            ax.set_ylabel("Sensitivity (N/mm)")
+            ax.legend()
+            ax.grid(True)
+            plt.suptitle(f"Ground Effect at {velocity} m/s")
+            plt.show()
+
+            self.result_var.set(
+                f"Ride height sweep completed ({len(heights_mm)} heights).\n"
+                f"{heights_mm[0]:.0f} mm: drag {drag[0]:.2f} N, downforce {downforce[0]:.2f} N\n"
+                f"{heights_mm[-1]:.0f} mm: drag {drag[-1]:.2f} N, downforce {downforce[-1]:.2f} N\n"
+                f"Mean change: {np.mean(data['drag_per_mm']):.3f} N/mm drag, "
+                f"{np.mean(data['downforce_per_mm']):.3f} N/mm downforce"
+            )
+        except Exception as e:
+            self.result_var.set(f"Ride height sweep error: {str(e)}")
+
+    def parse_angle_range(self, angle_vars):
+        start = float(angle_vars['start'].get())
+        end = float(angle_vars['end'].get())
+        step = float(angle_vars['step'].get())
+        if step <= 0 or start > end:
+            raise ValueError("Invalid angle range or step.")
+        return np.arange(start, end + step/2, step)
+
+    def export_animation(self, sweep):
+        try:
+            if self.current_stl is None:
+                raise ValueError("No STL object loaded.")
+            data = self.range_data if sweep == 'velocity' else self.orientation_data
+            if data is None:
+                self.result_var.set(f"No {sweep} sweep data to animate.")
+                return
+            file_path = filedialog.asksaveasfilename(defaultextension=".mp4",
+                                                     filetypes=[("MP4 Video", "*.mp4"),
+                                                                ("GIF Animation", "*.gif")])
+            if not file_path:
+                return
+
+            self.update_stage_inputs()
+            _, area_vectors, _ = self.stages.get('geometry')
+            if sweep == 'velocity':
+                density = self.flow_vars['density'].get()
+                if "altitude" in data.dtype.names:
+                    # Animate the first atmospheric condition of the sweep
+                    data = data[(data["altitude"] == data["altitude"][0]) &
+                                (data["temperature_offset"] == data["temperature_offset"][0])]
+                    density = data["density"][0]
+                q_max = simulation.dynamic_pressure(density, data["velocity"].max())
+                # Frames advance at the uniform step; adaptive samples are interpolated
+                step = float(self.vel_step_var.get())
+                velocities = np.arange(data["velocity"].min(), data["velocity"].max() + step/2, step)
+                drag_forces = np.interp(velocities, data["velocity"], data["drag_force_N"])
+                frames = visualization.velocity_sweep_frames(self.stages.get('cp'), velocities, density,
+                                                             drag_forces)
+            else:
+                q_max = data["q"]
+                frames = visualization.orientation_sweep_frames(area_vectors, data["yaw"].ravel(),
+                                                                data["pitch"].ravel(), q_max,
+                                                                data["drag_forces"].ravel())
+
+            # Rendered off screen so the interactive view is left untouched
+            renderer = visualization.OffscreenRenderer(self.tunnel_key())
+            renderer.set_object(self.current_stl.copy(deep=False))
+            renderer.set_streamlines(self.stages.get('streamlines'))
+            clim = (simulation.BASE_CP * q_max, simulation.STAGNATION_CP * q_max)
+            count = visualization.write_animation(renderer, frames, file_path, clim)
+            renderer.close()
+            self.result_var.set(f"Animation with {count} frames exported to: {file_path}")
+        except Exception as e:
+            self.result_var.set(f"Animation export error: {str(e)}")
+
+    def export_fields(self):
+        try:
+            file_path = filedialog.asksaveasfilename(defaultextension=".vtm",
+                                                     filetypes=[("VTK MultiBlock", "*.vtm"),
+                                                                ("VTK ImageData", "*.vti")])
+            if not file_path:
+                return
+            self.update_stage_inputs()
+            origin, spacing = self.stages.get('pressure_grid')
+            q = self.stages.get('q')
+            volume = visualization.field_dataset(origin, spacing, self.stages.get('flow_field'),
+                                                 self.flow_vars['velocity'].get(), q, self.grid_dims)
+            surface = None
+            if self.current_stl is not None:
+                surface = self.current_stl.copy(deep=False)
+                surface.cell_data["Cp"] = self.stages.get('cp')
+                surface.cell_data["pressure"] = q * surface.cell_data["Cp"]
+            streamlines = self.streamlines if self.streamlines is not None else self.stages.get('streamlines')
+            visualization.export_fields(file_path, volume, streamlines, surface)
+            self.result_var.set(f"Fields exported to: {file_path}")
+        except Exception as e:
+            self.result_var.set(f"Field export error: {str(e)}")
+
+    def export_single_data(self):
+        try:
+            if self.last_result is None:
+                self.result_var.set("No simulation results to export.")
+                return
+            result = self.last_result
             data = {
-                "velocity": velocity,
-                "drag_force_N": drag_force,
-                "power_W": power,
-                "frontal_area": frontal_area
+                "velocity": result["velocity"],
+                "drag_force_N": float(result["drag_force_N"]),
+                "power_W": float(result["power_W"]),
+                "reynolds": float(result["reynolds"]),
+                "frontal_area": result["frontal_area"],
+                "reference_area": result["frontal_area"],
+                "reference_length": float(np.sqrt(result["frontal_area"])),
+                "blockage_ratio": float(result["blockage_ratio"]),
+                "blockage_correction": result["blockage_correction"],
+                "force_N": result["force_N"].tolist(),
+                "moment_Nm": result["moment_Nm"].tolist(),
+                "reference_point": result["reference_point"].tolist(),
+                "center_of_pressure": result["center_of_pressure"].tolist(),
+                "coefficients": dict(zip(simulation.COEFFICIENT_NAMES, result["coefficients"].tolist())),
+                "parts": [
+                    {
+                        "part": i,
+                        "drag_force_N": float(f @ simulation.WIND_VECTOR),
+                        "force_N": f.tolist(),
+                        "moment_Nm": m.tolist(),
+                        "center_of_pressure": r.tolist(),
+                        "coefficients": dict(zip(simulation.COEFFICIENT_NAMES, c.tolist()))
+                    }
+                    for i, (f, m, r, c) in enumerate(zip(result["part_forces_N"], result["part_moments_Nm"],
+                                                         result["part_centers_of_pressure"],
+                                                         result["part_coefficients"]))
+                ]
             }
             file_path = filedialog.asksaveasfilename(defaultextension=".json",
                                                      filetypes=[("JSON Files", "*.json"),
@@ -489,10 +1309,19 @@ class WindTunnelApp:
                     with open(file_path, "w") as f:
                         json.dump(data, f, indent=4)
                 else:
+                    # One row for the whole object followed by one row per part
+                    fieldnames = ["velocity", "part", "drag_force_N", "fx_N", "fy_N", "fz_N", "mx_Nm", "my_Nm", "mz_Nm",
+                                  "cop_x_m", "cop_y_m", "cop_z_m", *simulation.COEFFICIENT_NAMES]
+                    rows = [("total", data["drag_force_N"], data["force_N"], data["moment_Nm"],
+                             data["center_of_pressure"], data["coefficients"])]
+                    rows += [(p["part"], p["drag_force_N"], p["force_N"], p["moment_Nm"],
+                              p["center_of_pressure"], p["coefficients"]) for p in data["parts"]]
                     with open(file_path, "w", newline='') as f:
-                        writer = csv.DictWriter(f, fieldnames=data.keys())
-                        writer.writeheader()
-                        writer.writerow(data)
+                        writer = csv.writer(f)
+                        writer.writerow(fieldnames)
+                        for part, drag, force, moment, cop, coefficients in rows:
+                            writer.writerow([data["velocity"], part, drag, *force, *moment, *cop,
+                                             *coefficients.values()])
                 self.result_var.set(f"Single run data exported to: {file_path}")
         except Exception as e:
             self.result_var.set(f"Export error: {str(e)}")
@@ -505,26 +1334,23 @@ class WindTunnelApp:
             file_path = filedialog.asksaveasfilename(parent=self.root,
                                                      defaultextension=".json",
                                                      filetypes=[("JSON Files", "*.json"),
-                                                                ("CSV Files", "*.csv")])
+                                                                ("CSV Files", "*.csv")] +
+                                                               results_io.COLUMNAR_FILETYPES)
             if file_path:
+                metadata = {
+                    "tunnel": {k: v.get() for k, v in self.tunnel_vars.items()},
+                    "flow": {k: v.get() for k, v in self.flow_vars.items()},
+                    "scale": {k: v.get() for k, v in self.scale_vars.items()},
+                    "object_position": self.object_position,
+                    "blockage_correction": self.blockage_var.get()
+                }
                 if file_path.endswith(".json"):
-                    metadata = {
-                        "tunnel": {k: v.get() for k, v in self.tunnel_vars.items()},
-                        "flow": {k: v.get() for k, v in self.flow_vars.items()},
-                        "scale": {k: v.get() for k, v in self.scale_vars.items()},
-                        "object_position": self.object_position
-                    }
-                    export_data = {"metadata": metadata, "data": self.range_data}
-                    with open(file_path, "w") as f:
-                        json.dump(export_data, f, indent=4)
+                    results_io.export_json(file_path, self.range_data, metadata)
+                elif file_path.endswith((".h5", ".hdf5", ".parquet", ".npz")):
+                    # Columnar binary: each column is written as one array
+                    file_path = results_io.export_columns(file_path, self.range_data, metadata)
                 else:
-                    with open(file_path, "w", newline='') as f:
-                        writer = csv.DictWriter(f, fieldnames=["velocity", "drag_force_N", "power_W"])
-                        writer.writeheader()
-                        for v, d, p in zip(self.range_data["velocities"],
-                                           self.range_data["drag_forces"],
-                                           self.range_data["powers"]):
-                            writer.writerow({"velocity": v, "drag_force_N": d, "power_W": p})
+                    results_io.export_csv(file_path, self.range_data)
                 self.result_var.set(f"Range data exported to: {file_path}")
         except Exception as e:
             self.result_var.set(f"Export error: {str(e)}")
@@ -535,7 +1361,11 @@ class WindTunnelApp:
                 "tunnel": {k: v.get() for k, v in self.tunnel_vars.items()},
                 "flow": {k: v.get() for k, v in self.flow_vars.items()},
                 "scale": {k: v.get() for k, v in self.scale_vars.items()},
-                "object_position": self.object_position
+                "object_position": self.object_position,
+                "shape_class": self.shape_class_var.get(),
+                "ground": self.ground_var.get(),
+                "blockage_correction": self.blockage_var.get(),
+                "moment_reference": list(self.moment_reference()) if self.custom_reference_var.get() else None
             }
             file_path = filedialog.asksaveasfilename(defaultextension=".json",
                                                      filetypes=[("JSON Files", "*.json")])
@@ -559,6 +1389,13 @@ class WindTunnelApp:
                 for k, var in self.scale_vars.items():
                     var.set(config.get("scale", {}).get(k, var.get()))
                 self.object_position = config.get("object_position", self.object_position)
+                self.shape_class_var.set(config.get("shape_class", self.shape_class_var.get()))
+                self.ground_var.set(config.get("ground", self.ground_var.get()))
+                self.blockage_var.set(config.get("blockage_correction", self.blockage_var.get()))
+                reference = config.get("moment_reference")
+                self.custom_reference_var.set(reference is not None)
+                for k, value in zip(('x', 'y', 'z'), reference or ()):
+                    self.reference_vars[k].set(value)
                 self.update_tunnel_dimensions()
                 self.result_var.set("Config loaded.")
             else:
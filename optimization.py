@@ -0,0 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import simulation
+from cache import transform_key
+
+# Optimizable parameters: default bounds and initial simplex step
+PARAMETERS = {
+    "yaw": ((-180.0, 180.0), 10.0),
+    "pitch": ((-90.0, 90.0), 10.0),
+    "roll": ((-180.0, 180.0), 10.0),
+    "scale_x": ((0.25, 4.0), 0.2),
+    "scale_y": ((0.25, 4.0), 0.2),
+    "scale_z": ((0.25, 4.0), 0.2),
+}
+
+DEFAULTS = {"yaw": 0.0, "pitch": 0.0, "roll": 0.0, "scale_x": 1.0, "scale_y": 1.0, "scale_z": 1.0}
+
+SCALES = ("scale_x", "scale_y", "scale_z")
+
+
+def applied_scales(params, keep_volume=True):
+    # With keep_volume the scales are normalised to a unit product so that
+    # drag cannot be reduced by simply shrinking the object
+    p = dict(DEFAULTS, **params)
+    scale = np.array([p[name] for name in SCALES])
+    if keep_volume:
+        scale = scale / np.cbrt(np.prod(scale))
+    return scale
+
+
+def within_bounds(params, bounds, keep_volume=True):
+    # Volume normalisation can move a scale past its bound even when the
+    # search value is inside it, so the applied scales are checked too
+    bounds = dict(bounds)
+    for name, value in zip(SCALES, applied_scales(params, keep_volume)):
+        low, high = bounds.get(name, PARAMETERS[name][0])
+        if not low <= value <= high:
+            return False
+    return True
+
+
+def configuration_transform(params, keep_volume=True):
+    # Scale, then roll about x, pitch about y and yaw about z. Translation is
+    # left out: the panel model sees a uniform stream, so position does not
+    # change the loads.
+    p = dict(DEFAULTS, **params)
+    matrix = simulation.rotation_matrices(p["yaw"], p["pitch"]) @ simulation.rotation_matrix('x', p["roll"])
+    return matrix @ np.diag(applied_scales(params, keep_volume))
+
+
+# Geometry of the model being optimised, set once per worker process
+_problem = {}
+
+
+def init_problem(centers, area_vectors, q, keep_volume, cross_section=None, ground_points=None):
+    _problem.update(centers=centers, area_vectors=area_vectors, q=q, keep_volume=keep_volume,
+                    cross_section=cross_section, ground_points=ground_points)
+
+
+def evaluate_drag(params):
+    # With a tunnel cross-section the drag is blockage-corrected, and with
+    # the mesh points the moving-ground image follows the transformed
+    # bounds, as in the GUI's simulation stages
+    matrix = configuration_transform(params, _problem["keep_volume"])
+    centers, area_vectors = simulation.transform_geometry(_problem["centers"], _problem["area_vectors"], matrix)
+    points = _problem["ground_points"]
+    if points is None:
+        cp = simulation.pressure_coefficients(area_vectors)
+    else:
+        points = points @ matrix.T
+        bounds = np.column_stack((points.min(axis=0), points.max(axis=0))).ravel()
+        cp = simulation.ground_pressure_coefficients(centers, area_vectors,
+                                                     *simulation.equivalent_body(bounds))
+    loads = simulation.integrate_forces(centers, area_vectors, cp, _problem["q"])
+    drag = float(loads["force"] @ simulation.WIND_VECTOR)
+    if _problem["cross_section"] is not None:
+        drag *= float(simulation.blockage_correction(simulation.blockage_ratio(
+            simulation.projected_area(area_vectors), _problem["cross_section"])))
+    return drag
+
+
+class DragObjective:
+    # Batch objective: every point of a batch that is not already cached is
+    # evaluated in parallel across the pool. Points whose applied scales
+    # leave the bounds are rejected with an infinite drag.
+    def __init__(self, centers, area_vectors, q, names, keep_volume=True, workers=None,
+                 bounds=None, cross_section=None, ground_points=None):
+        self.names = list(names)
+        self.keep_volume = keep_volume
+        self.bounds = {} if bounds is None else dict(zip(self.names, bounds))
+        self.cache = {}
+        self.evaluations = 0
+        args = (centers, area_vectors, q, keep_volume, cross_section, ground_points)
+        init_problem(*args)
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_problem, initargs=args) \
+            if workers != 1 else None
+
+    def key(self, x):
+        return transform_key(np.asarray(x))
+
+    def __call__(self, points):
+        points = np.atleast_2d(points)
+        missing = []
+        for x in points:
+            key = self.key(x)
+            if key not in self.cache and key not in missing:
+                missing.append(key)
+        for key in list(missing):
+            if not within_bounds(dict(zip(self.names, key)), self.bounds, self.keep_volume):
+                self.cache[key] = np.inf
+                missing.remove(key)
+        if missing:
+            params = [dict(zip(self.names, key)) for key in missing]
+            mapper = map if self.executor is None else self.executor.map
+            for key, drag in zip(missing, mapper(evaluate_drag, params)):
+                self.cache[key] = drag
+            self.evaluations += len(missing)
+        return np.array([self.cache[self.key(x)] for x in points])
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def nelder_mead(objective, x0, step, bounds, max_iter=200, xtol=1e-3, ftol=1e-6):
+    # Nelder-Mead on box-bounded parameters. Reflection, expansion and both
+    # contractions of an iteration are evaluated as one batch, so each
+    # iteration costs one parallel round instead of up to three sequential
+    # ones; points are clipped to the bounds.
+    lower, upper = np.asarray(bounds, dtype=float).T
+    x0 = np.clip(np.asarray(x0, dtype=float), lower, upper)
+    n = len(x0)
+    simplex = np.vstack([x0] + [np.clip(x0 + step[i] * np.eye(n)[i], lower, upper) for i in range(n)])
+    values = objective(simplex)
+    history = [values.min()]
+
+    iterations = 0
+    for iteration in range(max_iter):
+        iterations = iteration + 1
+        order = np.argsort(values)
+        simplex, values = simplex[order], values[order]
+        spread = np.max(np.abs(simplex[1:] - simplex[0]) / np.asarray(step))
+        if spread < xtol and values[-1] - values[0] <= ftol * max(abs(values[0]), 1.0):
+            break
+
+        centroid = simplex[:-1].mean(axis=0)
+        worst = simplex[-1]
+        candidates = np.clip(np.array([
+            centroid + (centroid - worst),        # reflection
+            centroid + 2.0 * (centroid - worst),  # expansion
+            centroid + 0.5 * (centroid - worst),  # outside contraction
+            centroid - 0.5 * (centroid - worst),  # inside contraction
+        ]), lower, upper)
+        fr, fe, foc, fic = objective(candidates)
+
+        if fr < values[0]:
+            simplex[-1], values[-1] = (candidates[1], fe) if fe < fr else (candidates[0], fr)
+        elif fr < values[-2]:
+            simplex[-1], values[-1] = candidates[0], fr
+        elif fr < values[-1] and foc <= fr:
+            simplex[-1], values[-1] = candidates[2], foc
+        elif fr >= values[-1] and fic < values[-1]:
+            simplex[-1], values[-1] = candidates[3], fic
+        else:
+            # Shrink towards the best vertex
+            simplex[1:] = simplex[0] + 0.5 * (simplex[1:] - simplex[0])
+            values[1:] = objective(simplex[1:])
+        history.append(values.min())
+
+    best = np.argmin(values)
+    return simplex[best], values[best], {"iterations": iterations, "history": history}
+
+
+def optimize_drag(centers, area_vectors, q, names, x0=None, bounds=None, keep_volume=True,
+                  max_iter=200, workers=None, cross_section=None, ground_points=None):
+    names = list(names)
+    if x0 is None:
+        x0 = [DEFAULTS[name] for name in names]
+    if bounds is None:
+        bounds = [PARAMETERS[name][0] for name in names]
+    step = [PARAMETERS[name][1] for name in names]
+    objective = DragObjective(centers, area_vectors, q, names, keep_volume, workers, bounds,
+                              cross_section, ground_points)
+    try:
+        x, drag, info = nelder_mead(objective, x0, step, bounds, max_iter=max_iter)
+        # The starting point is the first simplex vertex, so this is a cache hit
+        info["initial_drag"] = float(objective(np.clip(x0, *np.asarray(bounds, dtype=float).T))[0])
+    finally:
+        objective.close()
+    info["evaluations"] = objective.evaluations
+    params = dict(zip(names, (float(v) for v in x)))
+    if any(name in SCALES for name in names):
+        # Report the scales that were applied, not the raw search values
+        params.update(zip(SCALES, (float(v) for v in applied_scales(params, keep_volume))))
+    return params, drag, info
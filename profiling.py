@@ -0,0 +1,133 @@
+import cProfile
+import functools
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+logger = logging.getLogger("wind_tunnel.profile")
+
+# Only the backends that can run here are offered
+CAPTURE_BACKENDS = ["cProfile"] + (["pyinstrument"] if pyinstrument is not None else [])
+
+
+class StageProfiler:
+    # Wall time, CPU time and peak traced memory for named stages. Stages
+    # nest: an inner stage is recorded under its parent's path and its peak
+    # is folded into the parent's. Peak memory comes from tracemalloc, which
+    # sees NumPy buffers but not memory allocated inside VTK.
+    def __init__(self, log_path=None, enabled=True, max_records=500, max_log_bytes=5 * 1024 ** 2):
+        self.log_path = log_path
+        self.enabled = enabled
+        self.max_records = max_records
+        self.max_log_bytes = max_log_bytes
+        self.records = deque(maxlen=max_records)
+        self.stack = []
+        self.listeners = []
+        self.capture_backend = None
+        self.capture_dir = "."
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        if not self.stack and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.stack:
+            # The parent's peak so far must survive the reset below
+            self.stack[-1]["peak"] = max(self.stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        entry = {"name": name, "peak": 0, "base": tracemalloc.get_traced_memory()[0]}
+        self.stack.append(entry)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self.stack.pop()
+            peak = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                self.stack[-1]["peak"] = max(self.stack[-1]["peak"], peak)
+            self.record({
+                "stage": "/".join([e["name"] for e in self.stack] + [name]),
+                "depth": len(self.stack),
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "peak_bytes": max(peak - entry["base"], 0),
+                "timestamp": time.time()
+            })
+            if not self.stack:
+                tracemalloc.stop()
+
+    def wrap(self, name, function):
+        # Top-level calls are also captured when a capture backend is set
+        @functools.wraps(function)
+        def wrapped(*args, **kwargs):
+            if self.stack:
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            with self.capture(name), self.stage(name):
+                return function(*args, **kwargs)
+        return wrapped
+
+    def record(self, record):
+        self.records.append(record)
+        # One JSON object per line, so the log can be grepped or loaded as a table
+        line = json.dumps(record)
+        logger.debug(line)
+        if self.log_path is not None:
+            self.rotate_log()
+            with open(self.log_path, "a") as f:
+                f.write(line + "\n")
+        for listener in self.listeners:
+            listener(record)
+
+    def rotate_log(self):
+        # Past the size limit the log moves to <log>.1, replacing the
+        # previous one, so at most two files' worth is kept on disk
+        if self.max_log_bytes is None or not os.path.exists(self.log_path):
+            return
+        if os.path.getsize(self.log_path) >= self.max_log_bytes:
+            os.replace(self.log_path, self.log_path + ".1")
+
+    @contextmanager
+    def capture(self, name):
+        # Optional whole-call profile of a top-level action, saved next to
+        # the log: a .prof file for cProfile, an .html report for pyinstrument
+        if self.capture_backend is None:
+            yield None
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.capture_dir, f"profile_{name}_{stamp}")
+        if self.capture_backend == "pyinstrument":
+            if pyinstrument is None:
+                raise ImportError("pyinstrument capture requires pyinstrument (pip install pyinstrument)")
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+            try:
+                yield base + ".html"
+            finally:
+                profiler.stop()
+                with open(base + ".html", "w") as f:
+                    f.write(profiler.output_html())
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield base + ".prof"
+            finally:
+                profiler.disable()
+                profiler.dump_stats(base + ".prof")
+
+    def summary(self, prefix=None):
+        records = self.records if prefix is None else [r for r in self.records if r["stage"].startswith(prefix)]
+        return [(r["stage"], r["wall_s"], r["cpu_s"], r["peak_bytes"]) for r in records]
@@ -0,0 +1,103 @@
+import json
+import os
+
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+COLUMNAR_FILETYPES = [("HDF5 Files", "*.h5"), ("Parquet Files", "*.parquet"), ("NumPy Archives", "*.npz")]
+
+# Keys used by the JSON range export since before results were structured arrays
+JSON_COLUMN_NAMES = {"velocity": "velocities", "drag_force_N": "drag_forces", "power_W": "powers"}
+
+
+def flatten_metadata(metadata, prefix=""):
+    flat = {}
+    for key, value in metadata.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metadata(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def as_columns(data):
+    if isinstance(data, np.ndarray) and data.dtype.names:
+        return {name: data[name] for name in data.dtype.names}
+    return data
+
+
+def export_columns(file_path, columns, metadata):
+    # Whole arrays go to disk in one call per column; returns the path
+    # actually written, which falls back to .npz when a backend is missing
+    columns = {name: np.ascontiguousarray(values) for name, values in as_columns(columns).items()}
+    root, ext = os.path.splitext(file_path)
+    ext = ext.lower()
+    if ext in (".h5", ".hdf5") and h5py is not None:
+        write_hdf5(file_path, columns, metadata)
+    elif ext == ".parquet" and pa is not None:
+        write_parquet(file_path, columns, metadata)
+    else:
+        file_path = root + ".npz"
+        write_npz(file_path, columns, metadata)
+    return file_path
+
+
+def write_hdf5(file_path, columns, metadata):
+    with h5py.File(file_path, "w") as f:
+        for name, values in columns.items():
+            f.create_dataset(name, data=values)
+        # Flat attributes for quick inspection, plus the full JSON document
+        for key, value in flatten_metadata(metadata).items():
+            f.attrs[key] = json.dumps(value) if isinstance(value, (list, tuple)) else value
+        f.attrs["metadata"] = json.dumps(metadata)
+
+
+def write_parquet(file_path, columns, metadata):
+    table = pa.table(columns)
+    table = table.replace_schema_metadata({"metadata": json.dumps(metadata)})
+    pq.write_table(table, file_path)
+
+
+def write_npz(file_path, columns, metadata):
+    np.savez(file_path, **columns, __metadata__=np.array(json.dumps(metadata)))
+
+
+def export_json(file_path, data, metadata):
+    columns = {JSON_COLUMN_NAMES.get(name, name): values.tolist() for name, values in as_columns(data).items()}
+    with open(file_path, "w") as f:
+        json.dump({"metadata": metadata, "data": columns}, f, indent=4)
+
+
+def export_csv(file_path, data):
+    columns = as_columns(data)
+    np.savetxt(file_path, np.column_stack(list(columns.values())), delimiter=",", fmt="%.16g",
+               header=",".join(columns), comments="")
+
+
+def load_columns(file_path):
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in (".h5", ".hdf5"):
+        with h5py.File(file_path, "r") as f:
+            columns = {name: f[name][()] for name in f.keys()}
+            metadata = json.loads(f.attrs["metadata"])
+    elif ext == ".parquet":
+        table = pq.read_table(file_path)
+        columns = {name: table.column(name).to_numpy() for name in table.column_names}
+        metadata = json.loads(table.schema.metadata[b"metadata"])
+    else:
+        with np.load(file_path) as data:
+            columns = {name: data[name] for name in data.files if name != "__metadata__"}
+            metadata = json.loads(str(data["__metadata__"]))
+    return columns, metadata
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+RUN_COLUMNS = [
+    ("model", "TEXT"),
+    ("mesh_hash", "TEXT"),
+    ("velocity", "REAL"),
+    ("density", "REAL"),
+    ("viscosity", "REAL"),
+    ("yaw", "REAL"),
+    ("pitch", "REAL"),
+    ("tunnel_length", "REAL"),
+    ("tunnel_width", "REAL"),
+    ("tunnel_height", "REAL"),
+    ("scale_x", "REAL"),
+    ("scale_y", "REAL"),
+    ("scale_z", "REAL"),
+    ("position_x", "REAL"),
+    ("position_y", "REAL"),
+    ("position_z", "REAL"),
+    ("drag_force_N", "REAL"),
+    ("power_W", "REAL"),
+    ("frontal_area", "REAL"),
+]
+
+COLUMN_TYPES = dict(RUN_COLUMNS)
+
+# Composite indexes for the common lookups: one model (or mesh) over a
+# velocity band, optionally narrowed by orientation
+INDEXES = {
+    "runs_model": ("model", "velocity", "yaw"),
+    "runs_mesh": ("mesh_hash", "velocity", "yaw"),
+    "runs_velocity": ("velocity", "yaw"),
+}
+
+CONDITION = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.+?)\s*$")
+
+
+# Where a model was loaded from does not change its results; the mesh hash
+# identifies the geometry
+UNKEYED_FIELDS = ("model", "model_path")
+
+
+def _normalise(value):
+    # 0 and 0.0 (or 20 and 20.0) describe the same configuration
+    if isinstance(value, dict):
+        return {k: _normalise(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(v) for v in value]
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def config_key(config):
+    if config.get("mesh_hash") is not None:
+        config = {k: v for k, v in config.items() if k not in UNKEYED_FIELDS}
+    return hashlib.sha1(json.dumps(_normalise(config), sort_keys=True).encode()).hexdigest()
+
+
+def flatten_config(config):
+    # Same layout as the metadata of export_range_data, plus model identity
+    # and orientation
+    return {
+        "model": config.get("model"),
+        "mesh_hash": config.get("mesh_hash"),
+        "velocity": config["flow"]["velocity"],
+        "density": config["flow"]["density"],
+        "viscosity": config["flow"].get("viscosity"),
+        "yaw": config.get("yaw", 0.0),
+        "pitch": config.get("pitch", 0.0),
+        "tunnel_length": config["tunnel"]["length"],
+        "tunnel_width": config["tunnel"]["width"],
+        "tunnel_height": config["tunnel"]["height"],
+        "scale_x": config["scale"]["scale_x"],
+        "scale_y": config["scale"]["scale_y"],
+        "scale_z": config["scale"]["scale_z"],
+        "position_x": config["object_position"][0],
+        "position_y": config["object_position"][1],
+        "position_z": config["object_position"][2],
+    }
+
+
+class ResultsStore:
+    # Append-only SQLite store. WAL journaling plus a commit per row means a
+    # crash loses at most the row being written, and a rerun can skip every
+    # configuration whose key is already present.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.conn = sqlite3.connect(file_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{name} {kind}" for name, kind in RUN_COLUMNS)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS runs (config_key TEXT PRIMARY KEY, {columns}, "
+            f"config TEXT, result TEXT, created REAL)"
+        )
+        for name, columns in INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON runs ({', '.join(columns)})")
+        self.conn.commit()
+
+    def __contains__(self, key):
+        return self.conn.execute("SELECT 1 FROM runs WHERE config_key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def completed_keys(self):
+        return {row[0] for row in self.conn.execute("SELECT config_key FROM runs")}
+
+    def append(self, config, result):
+        row = flatten_config(config)
+        row.update({name: result.get(name) for name in ("drag_force_N", "power_W", "frontal_area")})
+        names = ["config_key"] + [name for name, _ in RUN_COLUMNS] + ["config", "result", "created"]
+        values = [config_key(config)] + [row[name] for name, _ in RUN_COLUMNS] + \
+                 [json.dumps(config), json.dumps(result), time.time()]
+        self.conn.execute(
+            f"INSERT OR IGNORE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+            values
+        )
+        self.conn.commit()
+
+    def query(self, *conditions, columns=None, order_by="velocity", limit=None, **filters):
+        # Conditions are strings such as "yaw<5"; keyword filters match a
+        # value exactly or, given a (low, high) pair, an inclusive range with
+        # None for an open end. Columns and operators are checked against
+        # the schema and values are bound, so the indexes serve the lookup.
+        clauses, values = [], []
+        for condition in conditions:
+            match = CONDITION.match(condition)
+            if match is None:
+                raise ValueError(f"Invalid condition: {condition!r}")
+            name, op, value = match.groups()
+            clauses.append(f"{self._column(name)} {op} ?")
+            values.append(value if COLUMN_TYPES[name] == "TEXT" else float(value))
+        for name, value in filters.items():
+            if isinstance(value, (tuple, list)):
+                low, high = value
+                if low is not None:
+                    clauses.append(f"{self._column(name)} >= ?")
+                    values.append(low)
+                if high is not None:
+                    clauses.append(f"{self._column(name)} <= ?")
+                    values.append(high)
+            else:
+                clauses.append(f"{self._column(name)} = ?")
+                values.append(value)
+
+        columns = [name for name, _ in RUN_COLUMNS] if columns is None else [self._column(c) for c in columns]
+        sql = f"SELECT config_key, {', '.join(columns)} FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            sql += f" ORDER BY {self._column(order_by)}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self.conn.execute(sql, values).fetchall()
+        return self._records(["config_key"] + columns, rows)
+
+    def result(self, key):
+        # Full stored result (forces, moments, parts) for one run
+        row = self.conn.execute("SELECT config, result FROM runs WHERE config_key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0]), json.loads(row[1])
+
+    @staticmethod
+    def _column(name):
+        if name not in COLUMN_TYPES:
+            raise ValueError(f"Unknown column: {name!r}")
+        return name
+
+    @staticmethod
+    def _records(names, rows):
+        # Structured array, like the range analysis results; text columns
+        # are sized to their longest value
+        fields = []
+        for i, name in enumerate(names):
+            if name == "config_key" or COLUMN_TYPES[name] == "TEXT":
+                width = max((len(row[i] or "") for row in rows), default=1)
+                fields.append((name, f"U{max(width, 1)}"))
+            else:
+                fields.append((name, np.float64))
+        data = np.empty(len(rows), dtype=fields)
+        for i, name in enumerate(names):
+            values = [row[i] for row in rows]
+            if COLUMN_TYPES.get(name) == "REAL":
+                values = [np.nan if v is None else v for v in values]
+            else:
+                values = ["" if v is None else v for v in values]
+            data[name] = values
+        return data
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,411 @@
+import heapq
+
+import numpy as np
+
+# Flow enters the tunnel along +x
+WIND_VECTOR = np.array([1.0, 0.0, 0.0])
+
+# Panel pressure model: windward faces follow a Newtonian cos² law up to the
+# stagnation pressure, leeward faces sit at a constant base pressure
+STAGNATION_CP = 1.0
+BASE_CP = -0.2
+
+PART_ARRAY = "RegionId"
+
+# Solid and wake blockage of a closed test section, lumped as in the
+# continuity correction for bluff bodies: forces measured at the nominal q
+# are divided by (1 + ε)², ε = S / (4 C) for projected area S in a
+# cross-section C
+BLOCKAGE_FACTOR = 0.25
+
+
+def dynamic_pressure(density, velocity):
+    return 0.5 * density * np.square(velocity)
+
+
+def prepare_mesh(mesh):
+    # Outward normals plus one part id per connected component of the model
+    mesh = mesh.compute_normals(auto_orient_normals=True)
+    if not mesh.is_all_triangles:
+        mesh = mesh.triangulate()
+    return mesh.connectivity('all')
+
+
+def place_on_floor(mesh):
+    # Center the object across the tunnel and stand it on the floor
+    bounds = mesh.bounds
+    mesh.translate([
+        -(bounds[0] + bounds[1]) / 2,
+        -(bounds[2] + bounds[3]) / 2,
+        -bounds[4]
+    ], inplace=True)
+    return mesh
+
+
+def cell_geometry(mesh):
+    points = np.asarray(mesh.points, dtype=float)
+    tris = mesh.regular_faces
+    a, b, c = points[tris[:, 0]], points[tris[:, 1]], points[tris[:, 2]]
+    centers = (a + b + c) / 3.0
+    # Area vectors carry both the outward normal and the panel area
+    area_vectors = 0.5 * np.cross(b - a, c - a)
+    if PART_ARRAY in mesh.cell_data:
+        part_ids = np.asarray(mesh.cell_data[PART_ARRAY], dtype=np.intp)
+    else:
+        part_ids = np.zeros(len(tris), dtype=np.intp)
+    return centers, area_vectors, part_ids
+
+
+def panel_cp(cos):
+    return np.where(cos > 0, STAGNATION_CP * cos ** 2, BASE_CP)
+
+
+def pressure_coefficients(area_vectors, wind=WIND_VECTOR):
+    areas = np.linalg.norm(area_vectors, axis=1)
+    cos = -(area_vectors @ wind) / np.where(areas > 0, areas, 1.0)
+    return panel_cp(cos)
+
+
+def integrate_forces(centers, area_vectors, cp, q, part_ids=None, reference_point=(0, 0, 0)):
+    # Pressure acts against the outward normal of every panel
+    forces = (-q * cp)[:, None] * area_vectors
+    moments = np.cross(centers - np.asarray(reference_point, dtype=float), forces)
+
+    n_parts = int(part_ids.max()) + 1 if part_ids is not None and len(part_ids) else 1
+    if n_parts == 1:
+        # A single part costs no more than the plain total
+        parts = np.concatenate((forces.sum(axis=0), moments.sum(axis=0)))[None, :]
+    else:
+        # One segmented reduction per component; the total is the sum of
+        # the parts
+        parts = np.column_stack([np.bincount(part_ids, weights=component, minlength=n_parts)
+                                 for component in (*forces.T, *moments.T)])
+    total = parts.sum(axis=0)
+
+    return {
+        "force": total[:3],
+        "moment": total[3:],
+        "part_forces": parts[:, :3],
+        "part_moments": parts[:, 3:]
+    }
+
+
+# Tunnel axes: drag, side force and lift along x, y, z; rolling, pitching
+# and yawing moments about x, y, z
+COEFFICIENT_NAMES = ("CD", "CS", "CL", "Cl", "Cm", "Cn")
+
+
+def center_of_pressure(force, moment, reference_point=(0, 0, 0)):
+    # Point on the line of action of the resultant closest to the reference
+    # point: r = ref + F × M / |F|². Works on single loads or stacks of them
+    # (e.g. part_forces); NaN where the force vanishes.
+    force, moment = np.asarray(force, dtype=float), np.asarray(moment, dtype=float)
+    f2 = np.einsum('...i,...i->...', force, force)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(f2 > 0, np.cross(force, moment) / f2, np.nan)
+    return np.asarray(reference_point, dtype=float) + offset
+
+
+def aero_coefficients(force, moment, q, area, length):
+    # Six coefficients in COEFFICIENT_NAMES order; forces over q·S, moments
+    # over q·S·L
+    scale = q * area
+    return np.concatenate([np.asarray(force) / scale, np.asarray(moment) / (scale * length)], axis=-1)
+
+
+def mesh_loads(mesh, q, reference_point=(0, 0, 0)):
+    # The run_simulation path without the stage cache: panel Cp integrated
+    # over a prepared mesh at dynamic pressure q
+    centers, area_vectors, part_ids = cell_geometry(mesh)
+    cp = pressure_coefficients(area_vectors)
+    return integrate_forces(centers, area_vectors, cp, q, part_ids, reference_point)
+
+
+def frontal_area(bounds):
+    return (bounds[3] - bounds[2]) * (bounds[5] - bounds[4])
+
+
+def characteristic_length(bounds):
+    return np.sqrt(frontal_area(bounds))
+
+
+def tunnel_cross_section(tunnel):
+    # The test section is the width × height box that the flow grids and
+    # object placement use
+    _, width, height = tunnel
+    return width * height
+
+
+def blockage_ratio(projected, cross_section):
+    return np.asarray(projected, dtype=float) / cross_section
+
+
+def blockage_correction(ratio):
+    # Multiplier taking forces at the nominal tunnel q to free-air forces
+    return 1.0 / np.square(1.0 + BLOCKAGE_FACTOR * np.asarray(ratio, dtype=float))
+
+
+def reynolds_number(density, velocity, viscosity, length):
+    return np.asarray(density) * np.asarray(velocity) * length / np.asarray(viscosity)
+
+
+def sphere_drag_coefficient(reynolds):
+    # Morrison (2013) correlation for a smooth sphere, valid up to Re = 1e6,
+    # including the drag crisis near Re = 2.6e5
+    re = np.asarray(reynolds, dtype=float)
+    return (24.0 / re
+            + 2.6 * (re / 5.0) / (1 + (re / 5.0) ** 1.52)
+            + 0.411 * (re / 2.63e5) ** -7.94 / (1 + (re / 2.63e5) ** -8.0)
+            + 0.25 * (re / 1e6) / (1 + re / 1e6))
+
+
+# Cd(Re) lookup tables on a common log10(Re) grid, built once at import.
+# Sharp-edged bodies separate at fixed edges, so their Cd is flat above the
+# Stokes range; the cylinder follows tabulated cross-flow data.
+CD_LOG_RE = np.linspace(-1.0, 7.0, 321)
+_cylinder_points = (
+    [-1.0, 0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 5.3, 5.5, 5.7, 6.0, 7.0],
+    [58.0, 10.0, 2.8, 1.4, 1.0, 1.15, 1.2, 1.2, 0.5, 0.3, 0.35, 0.6],
+)
+CD_TABLES = {
+    "car": np.full_like(CD_LOG_RE, 0.30),
+    "sphere": sphere_drag_coefficient(10 ** CD_LOG_RE),
+    "cylinder": np.interp(CD_LOG_RE, *_cylinder_points),
+    "cube": 1.05 + 24.0 / 10 ** CD_LOG_RE,
+    "flat_plate": 1.17 + 24.0 / 10 ** CD_LOG_RE,
+}
+SHAPE_CLASSES = list(CD_TABLES)
+
+
+def drag_coefficient(reynolds, shape_class="car"):
+    # Linear in log10(Re); values outside the table hold the end points
+    log_re = np.log10(np.maximum(reynolds, 10 ** CD_LOG_RE[0]))
+    return np.interp(log_re, CD_LOG_RE, CD_TABLES[shape_class])
+
+
+def range_results(velocities, drag_forces, **extra_columns):
+    # One record per sweep point, kept as a structured array for plotting
+    # and export; extra columns (e.g. sweep axes) follow the core fields
+    fields = [("velocity", np.float64), ("drag_force_N", np.float64), ("power_W", np.float64)]
+    fields += [(name, np.asarray(values).dtype) for name, values in extra_columns.items()]
+    data = np.empty(np.shape(velocities), dtype=fields)
+    data["velocity"] = velocities
+    data["drag_force_N"] = drag_forces
+    data["power_W"] = data["drag_force_N"] * data["velocity"]
+    for name, values in extra_columns.items():
+        data[name] = values
+    return data
+
+
+def adaptive_samples(solve, start, end, budget=32, min_step=0.0, rel_tol=1e-3, initial=5):
+    # Interval refinement driven by the error of linear interpolation: every
+    # interval knows its midpoint value, and the interval whose midpoint
+    # deviates most from the chord is split next, up to a budget of solver
+    # calls. solve() takes an array of velocities and is called in batches.
+    # The first pass costs initial points plus one midpoint per interval, so
+    # initial is capped to fit the budget.
+    if budget < 3:
+        raise ValueError("adaptive_samples needs a budget of at least 3 solver calls")
+    initial = max(2, min(initial, (budget + 1) // 2))
+    x = np.linspace(start, end, initial)
+    samples = dict(zip(x, solve(x)))
+    calls = len(x)
+    heap = []
+
+    def push(intervals):
+        nonlocal calls
+        mids = np.array([(a + b) / 2 for a, b in intervals])
+        for (a, b), m, fm in zip(intervals, mids, solve(mids)):
+            samples[m] = fm
+            error = abs(fm - (samples[a] + samples[b]) / 2)
+            heapq.heappush(heap, (-error, a, b))
+        calls += len(intervals)
+
+    push(list(zip(x[:-1], x[1:])))
+    while heap and calls + 2 <= budget:
+        values = np.fromiter(samples.values(), dtype=float)
+        tolerance = rel_tol * max(np.ptp(values), np.finfo(float).tiny)
+        error, a, b = heapq.heappop(heap)
+        if -error <= tolerance:
+            break
+        if (b - a) / 2 < min_step:
+            continue
+        m = (a + b) / 2
+        push([(a, m), (m, b)])
+
+    x = np.array(sorted(samples))
+    return x, np.array([samples[v] for v in x])
+
+
+def rotation_matrix(axis, angle):
+    # Right-handed rotation about a tunnel axis, angle in degrees
+    c, s = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    i, j = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}[axis.lower()]
+    R = np.eye(3)
+    R[i, i], R[i, j] = c, -s
+    R[j, i], R[j, j] = s, c
+    return R
+
+
+def rotation_matrices(yaw, pitch):
+    # Pitch about y followed by yaw about z, angles in degrees
+    yaw, pitch = np.broadcast_arrays(np.radians(np.asarray(yaw, dtype=float)),
+                                     np.radians(np.asarray(pitch, dtype=float)))
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    R = np.empty(yaw.shape + (3, 3))
+    R[..., 0, 0] = cy * cp
+    R[..., 0, 1] = -sy
+    R[..., 0, 2] = cy * sp
+    R[..., 1, 0] = sy * cp
+    R[..., 1, 1] = cy
+    R[..., 1, 2] = sy * sp
+    R[..., 2, 0] = -sp
+    R[..., 2, 1] = 0.0
+    R[..., 2, 2] = cp
+    return R
+
+
+def decompose_transform(matrix, atol=1e-6):
+    # Inverse of rotation_matrices(yaw, pitch) @ diag(scale) for the linear
+    # part of a transform: returns (yaw, pitch, scale), or None when the
+    # transform also rolls, mirrors or shears the object
+    M = np.asarray(matrix, dtype=float)[:3, :3]
+    scale = np.linalg.norm(M, axis=0)
+    if np.any(scale <= atol) or np.linalg.det(M) <= 0:
+        return None
+    R = M / scale
+    yaw = np.degrees(np.arctan2(-R[0, 1], R[1, 1]))
+    pitch = np.degrees(np.arctan2(-R[2, 0], R[2, 2]))
+    if not np.allclose(rotation_matrices(yaw, pitch) * scale, M, atol=atol * max(scale.max(), 1.0)):
+        return None
+    # Rounded like cache.transform_key so that float noise (and -0.0) does
+    # not give an equal orientation a new config key
+    yaw, pitch, scale = (np.round(v, 9) + 0.0 for v in (yaw, pitch, scale))
+    return float(yaw), float(pitch), scale
+
+
+def orientation_loads(area_vectors, yaw, pitch, q, wind=WIND_VECTOR, chunk_cells=1 << 22):
+    # Rotating the body by R is the same as rotating the wind by R^T in the
+    # body frame, so every orientation reduces to one column of a matrix
+    # product against the unrotated area vectors. Angles are paired
+    # element-wise; returns the tunnel-frame forces and frontal areas.
+    R = rotation_matrices(np.ravel(yaw), np.ravel(pitch))
+    body_wind = np.einsum('kji,j->ki', R, wind)
+
+    areas = np.linalg.norm(area_vectors, axis=1)
+    unit_vectors = area_vectors / np.where(areas > 0, areas, 1.0)[:, None]
+    n_angles = len(body_wind)
+    body_forces = np.empty((n_angles, 3))
+    frontal = np.empty(n_angles)
+    # Bound the (cells x angles) working set for very large meshes
+    step = max(1, chunk_cells // max(len(area_vectors), 1))
+    for start in range(0, n_angles, step):
+        block = slice(start, start + step)
+        cos = -(unit_vectors @ body_wind[block].T)
+        cp = panel_cp(cos)
+        body_forces[block] = -(cp.T @ area_vectors)
+        frontal[block] = np.maximum(cos, 0).T @ areas
+
+    forces = np.einsum('kij,kj->ki', R, body_forces) * np.reshape(q, (-1, 1))
+    return forces, frontal
+
+
+def orientation_sweep(area_vectors, yaws, pitches, q, wind=WIND_VECTOR, chunk_cells=1 << 22):
+    yaw_grid, pitch_grid = np.meshgrid(yaws, pitches)
+    forces, frontal = orientation_loads(area_vectors, yaw_grid, pitch_grid, q, wind, chunk_cells)
+    shape = yaw_grid.shape
+    return {
+        "yaw": yaw_grid,
+        "pitch": pitch_grid,
+        "frontal_area": frontal.reshape(shape),
+        "forces": forces.reshape(shape + (3,)),
+        "drag_forces": (forces @ wind).reshape(shape)
+    }
+
+
+def equivalent_body(bounds):
+    # Sphere with the object's frontal area, centred on its bounding box
+    center = np.array([(bounds[0] + bounds[1]) / 2, (bounds[2] + bounds[3]) / 2, (bounds[4] + bounds[5]) / 2])
+    radius = np.sqrt(max(frontal_area(bounds), 0.0) / np.pi)
+    return center, radius
+
+
+def doublet_velocity(r, radius, wind=WIND_VECTOR):
+    # Perturbation velocity (per unit free-stream speed) of a sphere's
+    # doublet at offsets r from its centre
+    d = np.linalg.norm(r, axis=-1)[..., None]
+    return 0.5 * radius ** 3 * (wind / d ** 3 - 3 * (r @ wind)[..., None] * r / d ** 5)
+
+
+def image_center(center):
+    # Mirror of a body centre in the tunnel floor (z = 0)
+    return np.asarray(center, dtype=float) * np.array([1.0, 1.0, -1.0])
+
+
+def potential_flow(points, center, radius, wind=WIND_VECTOR, ground=False):
+    # Uniform stream plus a doublet: inviscid flow past a sphere. With
+    # ground=True an image doublet below the floor makes z = 0 a streamline,
+    # i.e. a moving-ground boundary. Returns the velocity per unit
+    # free-stream speed and the pressure coefficient.
+    velocity = np.tile(np.asarray(wind, dtype=float), (len(points), 1))
+    if center is not None and radius > 0:
+        r = np.asarray(points, dtype=float) - center
+        dist = np.linalg.norm(r, axis=1)
+        outside = dist >= radius
+        velocity[outside] += doublet_velocity(r[outside], radius, wind)
+        if ground:
+            velocity[outside] += doublet_velocity(points[outside] - image_center(center), radius, wind)
+        # Points inside the body are at rest
+        velocity[~outside] = 0.0
+    cp = 1.0 - np.einsum('ij,ij->i', velocity, velocity)
+    return velocity, cp
+
+
+def local_pressure_coefficients(area_vectors, local_velocity):
+    # Panel Cp in a non-uniform onset flow: the Newtonian law applied to the
+    # local flow direction, scaled by the local dynamic pressure
+    speed2 = np.einsum('ij,ij->i', local_velocity, local_velocity)
+    areas = np.linalg.norm(area_vectors, axis=1)
+    cos = -np.einsum('ij,ij->i', area_vectors, local_velocity) / np.maximum(areas * np.sqrt(speed2), 1e-300)
+    return panel_cp(cos) * speed2
+
+
+def ground_pressure_coefficients(centers, area_vectors, center, radius, wind=WIND_VECTOR):
+    # Mirror-image ground effect: the body's own panels see the free stream
+    # plus the velocity induced by its image below the floor
+    local = wind + doublet_velocity(centers - image_center(center), radius, wind)
+    return local_pressure_coefficients(area_vectors, local)
+
+
+def ride_height_sweep(centers, area_vectors, center, radius, heights, q, wind=WIND_VECTOR,
+                      chunk_cells=1 << 22):
+    # Forces with the body raised by each height (m). The geometry is
+    # reused; only the image term changes, since raising the body by h
+    # lowers its image by h.
+    heights = np.asarray(heights, dtype=float)
+    forces = np.empty((len(heights), 3))
+    step = max(1, chunk_cells // max(len(area_vectors), 1))
+    for start in range(0, len(heights), step):
+        h = heights[start:start + step, None, None]
+        image = image_center(center) - 2 * h * np.array([0.0, 0.0, 1.0])
+        local = wind + doublet_velocity(centers[None] - image, radius, wind)
+        speed2 = np.einsum('hij,hij->hi', local, local)
+        areas = np.linalg.norm(area_vectors, axis=1)
+        cos = -np.einsum('ij,hij->hi', area_vectors, local) / np.maximum(areas * np.sqrt(speed2), 1e-300)
+        cp = panel_cp(cos) * speed2
+        forces[start:start + step] = -q * (cp @ area_vectors)
+    return forces
+
+
+def transform_geometry(centers, area_vectors, matrix, offset=(0, 0, 0)):
+    # Points map through M; area vectors map through its cofactor matrix,
+    # which keeps them normal to the panels under non-uniform scaling
+    matrix = np.asarray(matrix, dtype=float)
+    cofactor = np.linalg.det(matrix) * np.linalg.inv(matrix).T
+    return centers @ matrix.T + np.asarray(offset, dtype=float), area_vectors @ cofactor.T
+
+
+def projected_area(area_vectors, wind=WIND_VECTOR):
+    # Windward panels projected onto the plane normal to the flow
+    return np.maximum(-(area_vectors @ wind), 0).sum()
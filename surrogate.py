@@ -0,0 +1,139 @@
+import numpy as np
+
+import simulation
+
+# Stored columns that identify the body and tunnel behind a run. Rows that
+# differ in any of them are different experiments, not samples of one surface.
+BODY_COLUMNS = ("mesh_hash", "scale_x", "scale_y", "scale_z", "tunnel_length", "tunnel_width", "tunnel_height")
+
+
+class DragSurrogate:
+    # Multilinear response surface over a regular grid of sweep results.
+    #
+    # Pressure drag is linear in the dynamic pressure, so the grid stores
+    # drag per unit q and predictions multiply by 0.5*rho*v^2 exactly; only
+    # the remaining axes (yaw, pitch, or velocity when the drag law depends
+    # on it) are interpolated. Queries outside the sampled box are sent to
+    # the solver instead of being extrapolated.
+    def __init__(self, axes, drag_area, solver=None):
+        # axes: ordered {name: increasing 1D array}; drag_area has one
+        # dimension per axis in the same order
+        self.names = list(axes)
+        self.axes = [np.asarray(values, dtype=float) for values in axes.values()]
+        self.drag_area = np.asarray(drag_area, dtype=float)
+        if self.drag_area.shape != tuple(len(a) for a in self.axes):
+            raise ValueError("drag_area shape does not match the axes")
+        self.solver = solver
+        self.error_area = self.node_errors()
+
+    @classmethod
+    def from_orientation_sweep(cls, area_vectors, yaws, pitches, wind=simulation.WIND_VECTOR):
+        # Sample once at q = 1; the same geometry serves as the fallback solver
+        yaws, pitches = np.sort(np.unique(yaws)), np.sort(np.unique(pitches))
+        sweep = simulation.orientation_sweep(area_vectors, yaws, pitches, 1.0, wind)
+
+        def solver(batch):
+            forces, _ = simulation.orientation_loads(area_vectors, batch["yaw"], batch["pitch"], 1.0, wind)
+            return forces @ wind
+
+        return cls({"pitch": pitches, "yaw": yaws}, sweep["drag_forces"], solver)
+
+    @classmethod
+    def from_sweep(cls, sweep, solver=None):
+        # An orientation_sweep result as stored by the GUI: yaw and pitch
+        # grids, drag_forces and the q it was run at
+        pitches, yaws = np.asarray(sweep["pitch"])[:, 0], np.asarray(sweep["yaw"])[0]
+        return cls({"pitch": pitches, "yaw": yaws}, np.asarray(sweep["drag_forces"]) / sweep["q"], solver)
+
+    @classmethod
+    def from_records(cls, records, names=("pitch", "yaw"), solver=None):
+        # Rows from ResultsStore.query with velocity, density, drag_force_N,
+        # the named axes and the BODY_COLUMNS. Repeated nodes (e.g. several
+        # velocities) are averaged as drag per unit q; the rows must cover a
+        # full grid of one body in one tunnel.
+        missing = [name for name in BODY_COLUMNS if name not in records.dtype.names]
+        if missing:
+            raise ValueError(f"Records lack the columns {', '.join(missing)}")
+        mixed = [name for name in BODY_COLUMNS if len(np.unique(records[name])) > 1]
+        if mixed:
+            raise ValueError(f"Stored runs differ in {', '.join(mixed)}; select one body and tunnel")
+        q = simulation.dynamic_pressure(np.asarray(records["density"], dtype=float),
+                                        np.asarray(records["velocity"], dtype=float))
+        valid = q > 0
+        if not valid.any():
+            raise ValueError("No stored runs with a positive dynamic pressure")
+        values = np.asarray(records["drag_force_N"], dtype=float)[valid] / q[valid]
+        axes, index = {}, []
+        for name in names:
+            column = np.asarray(records[name], dtype=float)[valid]
+            axes[name], inverse = np.unique(column, return_inverse=True)
+            index.append(inverse)
+        shape = tuple(len(a) for a in axes.values())
+        total, count = np.zeros(shape), np.zeros(shape)
+        np.add.at(total, tuple(index), values)
+        np.add.at(count, tuple(index), 1)
+        if (count == 0).any():
+            raise ValueError(f"Stored runs do not cover a full {' x '.join(map(str, shape))} grid "
+                             f"of {', '.join(names)}")
+        return cls(axes, total / count, solver)
+
+    def node_errors(self):
+        # Linear interpolation error is bounded by h^2/8 |f''| per axis; the
+        # second difference f[i-1] - 2f[i] + f[i+1] is h^2 f'' on the grid
+        error = np.zeros_like(self.drag_area)
+        for axis in range(self.drag_area.ndim):
+            if self.drag_area.shape[axis] < 3:
+                continue
+            d2 = np.abs(np.diff(self.drag_area, n=2, axis=axis)) / 8.0
+            # Interior second differences, held at the boundary nodes
+            d2 = np.concatenate([np.take(d2, [0], axis=axis), d2, np.take(d2, [-1], axis=axis)], axis=axis)
+            error += d2
+        return error
+
+    def inside(self, points):
+        return np.all([(p >= a[0]) & (p <= a[-1]) for p, a in zip(points.T, self.axes)], axis=0)
+
+    def interpolate(self, field, points):
+        # Vectorized multilinear interpolation: one searchsorted per axis,
+        # then a weighted sum over the 2^d cell corners
+        lower, weights = [], []
+        for p, a in zip(points.T, self.axes):
+            if len(a) == 1:
+                lower.append(np.zeros(len(p), dtype=np.intp))
+                weights.append(np.zeros(len(p)))
+                continue
+            i = np.clip(np.searchsorted(a, p, side='right') - 1, 0, len(a) - 2)
+            lower.append(i)
+            weights.append((p - a[i]) / (a[i + 1] - a[i]))
+        result = np.zeros(len(points))
+        for corner in np.ndindex(*(min(2, len(a)) for a in self.axes)):
+            index = tuple(i + c for i, c in zip(lower, corner))
+            weight = np.prod([w if c else 1.0 - w for w, c in zip(weights, corner)], axis=0)
+            result += weight * field[index]
+        return result
+
+    def points(self, batch):
+        return np.column_stack([np.asarray(batch[name], dtype=float) for name in self.names])
+
+    def predict(self, batch, return_error=False):
+        # batch: mapping or structured array with 'velocity', 'density' and
+        # one column per grid axis. Returns drag in newtons.
+        points = self.points(batch)
+        q = simulation.dynamic_pressure(np.asarray(batch["density"], dtype=float),
+                                        np.asarray(batch["velocity"], dtype=float))
+        q = np.broadcast_to(q, (len(points),))
+        inside = self.inside(points)
+        drag_area = np.full(len(points), np.nan)
+        drag_area[inside] = self.interpolate(self.drag_area, points[inside])
+        error = np.zeros(len(points))
+        error[inside] = self.interpolate(self.error_area, points[inside])
+        outside = ~inside
+        if outside.any() and self.solver is not None:
+            subset = {name: points[outside, i] for i, name in enumerate(self.names)}
+            # The solver is exact, so these points carry no interpolation error
+            drag_area[outside] = self.solver(subset)
+        elif outside.any():
+            error[outside] = np.nan
+        if return_error:
+            return q * drag_area, q * error
+        return q * drag_area
@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+import pyvista as pv
+
+import simulation
+
+AIR_DENSITY = 1.225
+AIR_VISCOSITY = 1.8e-5
+
+# Angular resolution of the generated primitives; boxes use a matching
+# subdivision level
+RESOLUTIONS = {"coarse": 16, "medium": 48, "fine": 128}
+
+
+def box_level(resolution):
+    return max(0, resolution // 8 - 1)
+
+
+# Each case: a generator for a closed primitive facing the +x wind, its
+# reference area and length, the Reynolds numbers to run, and the
+# reference drag coefficient (a constant or a function of Re)
+CASES = {
+    "sphere": {
+        "mesh": lambda n: pv.Sphere(radius=0.5, theta_resolution=n, phi_resolution=n),
+        "area": np.pi / 4,
+        "length": 1.0,
+        "reynolds": [1e3, 1e4, 1e5, 3e5, 1e6],
+        "reference": simulation.sphere_drag_coefficient,
+        "source": "Morrison (2013) sphere correlation",
+    },
+    "flat_plate": {
+        # Square plate normal to the flow, 2% thick
+        "mesh": lambda n: pv.Box(bounds=(-0.01, 0.01, -0.5, 0.5, -0.5, 0.5), level=box_level(n), quads=False),
+        "area": 1.0,
+        "length": 1.0,
+        "reynolds": [1e5],
+        "reference": 1.17,
+        "source": "Hoerner, square plate normal to flow",
+    },
+    "cube": {
+        "mesh": lambda n: pv.Box(bounds=(-0.5, 0.5, -0.5, 0.5, -0.5, 0.5), level=box_level(n), quads=False),
+        "area": 1.0,
+        "length": 1.0,
+        "reynolds": [1e5],
+        "reference": 1.05,
+        "source": "Hoerner, cube face-on",
+    },
+    "cylinder": {
+        # Cross-flow cylinder with L/D = 10
+        "mesh": lambda n: pv.Cylinder(radius=0.5, height=10.0, direction=(0, 1, 0), resolution=n),
+        "area": 10.0,
+        "length": 1.0,
+        "reynolds": [1e5],
+        "reference": 0.82,
+        "source": "Fox & McDonald, finite cylinder L/D = 10",
+    },
+}
+
+
+def run_case(name, resolution, density=AIR_DENSITY, viscosity=AIR_VISCOSITY):
+    # One row per Reynolds number; the timed part is the same preparation
+    # and integration as run_simulation, not the mesh generation
+    case = CASES[name]
+    raw = case["mesh"](resolution)
+    start = time.perf_counter()
+    mesh = simulation.place_on_floor(simulation.prepare_mesh(raw))
+    unit_drag = simulation.mesh_loads(mesh, 1.0)["force"] @ simulation.WIND_VECTOR
+    setup_time = time.perf_counter() - start
+
+    rows = []
+    for reynolds in case["reynolds"]:
+        start = time.perf_counter()
+        velocity = reynolds * viscosity / (density * case["length"])
+        q = simulation.dynamic_pressure(density, velocity)
+        drag = unit_drag * q
+        cd = drag / (q * case["area"])
+        reference = case["reference"]
+        reference = float(reference(reynolds)) if callable(reference) else reference
+        rows.append({
+            "case": name,
+            "resolution": resolution,
+            "n_cells": int(mesh.n_cells),
+            "reynolds": reynolds,
+            "velocity": velocity,
+            "cd": float(cd),
+            "cd_reference": reference,
+            "error_pct": 100.0 * (cd - reference) / reference,
+            "wall_s": setup_time + time.perf_counter() - start,
+            "source": case["source"],
+        })
+    return rows
+
+
+def run_validation(cases=None, resolutions=None):
+    cases = list(CASES) if cases is None else cases
+    resolutions = list(RESOLUTIONS.values()) if resolutions is None else resolutions
+    return [row for name in cases for resolution in resolutions for row in run_case(name, resolution)]
+
+
+def format_report(rows):
+    lines = [f"{'case':<11}{'res':>5}{'cells':>9}{'Re':>10}{'Cd':>8}{'Cd ref':>8}{'error %':>9}{'time ms':>9}"]
+    for r in rows:
+        lines.append(f"{r['case']:<11}{r['resolution']:>5}{r['n_cells']:>9}{r['reynolds']:>10.0e}"
+                     f"{r['cd']:>8.3f}{r['cd_reference']:>8.3f}{r['error_pct']:>9.1f}{r['wall_s'] * 1e3:>9.1f}")
+    return "\n".join(lines)
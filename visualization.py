@@ -0,0 +1,278 @@
+import numpy as np
+import pyvista as pv
+
+try:
+    import imageio.v2 as imageio
+except ImportError:
+    imageio = None
+
+from simulation import BASE_CP, STAGNATION_CP, WIND_VECTOR, pressure_coefficients, rotation_matrices
+
+# Resolution of the tunnel pressure volume (x, y, z)
+PRESSURE_GRID_DIMS = (50, 40, 30)
+
+# Start-up view of the GUI, shared by the off-screen renderer
+DEFAULT_CAMERA = ('yz', 30, 30)
+
+
+def tunnel_mesh(tunnel):
+    # The test section box, open at the inlet and outlet
+    length, width, height = tunnel
+    box = pv.Box(bounds=(-length/2, length/2, -width/2, width/2, 0, height))
+    walls = np.abs(box.cell_normals[:, 0]) < 0.5
+    return box.extract_cells(np.flatnonzero(walls)).extract_surface(algorithm=None)
+
+
+def build_flow_grid(tunnel):
+    length, width, height = tunnel
+
+    # Create a grid covering the full tunnel
+    nx, ny, nz = 30, 20, 15
+    x = np.linspace(-length/2, length/2, nx)
+    y = np.linspace(-width/2, width/2, ny)
+    z = np.linspace(0, height, nz)
+    X, Y, Z = np.meshgrid(x, y, z, indexing="ij")
+    points = np.column_stack((X.ravel(), Y.ravel(), Z.ravel()))
+    grid = pv.StructuredGrid()
+    grid.points = points
+    grid.dimensions = (nx, ny, nz)
+
+    # Streamline paths only depend on the flow direction, not its magnitude
+    grid["vectors"] = np.tile(WIND_VECTOR, (grid.n_points, 1))
+    return grid
+
+
+def trace_streamlines(flow_grid, tunnel):
+    length, width, height = tunnel
+    ny, nz = 20, 15
+
+    # Create seed points across the tunnel inlet (front of the tunnel)
+    y_start = np.linspace(-width/2, width/2, int(ny/5))
+    z_start = np.linspace(0, height, int(nz/5))
+    Y0, Z0 = np.meshgrid(y_start, z_start, indexing="ij")
+    x_start = np.full(Y0.size, -length/2)
+    seed_points_array = np.column_stack((x_start, Y0.ravel(), Z0.ravel()))
+
+    source_mesh = pv.PolyData(seed_points_array)
+
+    return flow_grid.streamlines_from_source(
+        source_mesh,
+        vectors='vectors',
+        max_length=200,
+        integration_direction='forward',
+        initial_step_length=0.1,
+        terminal_speed=1e-5
+    )
+
+
+def pressure_grid_geometry(tunnel, dims=PRESSURE_GRID_DIMS):
+    # Origin and spacing of an ImageData spanning the tunnel box
+    length, width, height = tunnel
+    origin = (-length/2, -width/2, 0.0)
+    spacing = (length/(dims[0] - 1), width/(dims[1] - 1), height/(dims[2] - 1))
+    return origin, spacing
+
+
+def create_pressure_volume(origin, spacing, dims=PRESSURE_GRID_DIMS):
+    volume = pv.ImageData(dimensions=dims, origin=origin, spacing=spacing)
+    volume["pressure"] = np.zeros(volume.n_points)
+    return volume
+
+
+def update_pressure_volume(volume, origin, spacing, unit_field, q):
+    # Move the grid and rescale its scalars without reallocating anything
+    volume.origin = origin
+    volume.spacing = spacing
+    np.multiply(unit_field, q, out=volume.point_data["pressure"])
+    volume.GetPointData().GetArray("pressure").Modified()
+    return volume
+
+
+def scalar_limits(field):
+    lo, hi = float(np.min(field)), float(np.max(field))
+    if hi <= lo:
+        # A uniform field still needs a non-empty colour range
+        lo = min(0.0, hi - 1.0)
+    return lo, hi
+
+
+def grid_points(origin, spacing, dims=PRESSURE_GRID_DIMS):
+    # Point coordinates in ImageData order (x fastest)
+    axes = [origin[i] + spacing[i] * np.arange(dims[i]) for i in range(3)]
+    Z, Y, X = np.meshgrid(axes[2], axes[1], axes[0], indexing="ij")
+    return np.column_stack((X.ravel(), Y.ravel(), Z.ravel()))
+
+
+def field_slice(field, axis, index, dims=PRESSURE_GRID_DIMS):
+    # Strided view of one axis-aligned plane; no copy of the volume is made
+    volume = field.reshape((dims[2], dims[1], dims[0]) + field.shape[1:])
+    if axis == 'x':
+        return volume[:, :, index]
+    if axis == 'y':
+        return volume[:, index, :]
+    return volume[index]
+
+
+def create_slice_plane(axis, dims=PRESSURE_GRID_DIMS):
+    plane_dims = [1 if a == axis else n for a, n in zip('xyz', dims)]
+    plane = pv.ImageData(dimensions=plane_dims)
+    plane["pressure"] = np.zeros(plane.n_points)
+    return plane
+
+
+def update_slice_plane(plane, field, axis, index, origin, spacing, scale, dims=PRESSURE_GRID_DIMS):
+    # O(plane) resample: place the plane and copy its slice of the field in
+    axis_id = 'xyz'.index(axis)
+    plane_origin = list(origin)
+    plane_origin[axis_id] += index * spacing[axis_id]
+    plane.origin = plane_origin
+    plane.spacing = spacing
+    view = field_slice(field, axis, index, dims)
+    np.multiply(view, scale, out=plane.point_data["pressure"].reshape(view.shape))
+    plane.GetPointData().GetArray("pressure").Modified()
+    return plane
+
+
+def probe_field(field, points, origin, spacing, dims=PRESSURE_GRID_DIMS):
+    # Trilinear interpolation of a point (or vector) field at arbitrary points
+    f = (np.atleast_2d(points) - np.asarray(origin)) / np.asarray(spacing)
+    upper = np.array(dims) - 2
+    i0 = np.clip(np.floor(f).astype(int), 0, upper)
+    t = np.clip(f - i0, 0.0, 1.0)
+    result = 0.0
+    for corner in np.ndindex(2, 2, 2):
+        idx = i0 + corner
+        flat = idx[:, 0] + dims[0] * (idx[:, 1] + dims[1] * idx[:, 2])
+        weight = np.prod(np.where(corner, t, 1.0 - t), axis=1)
+        values = field[flat]
+        result = result + (weight[:, None] * values if values.ndim > 1 else weight * values)
+    return result
+
+
+class OffscreenRenderer:
+    # One off-screen plotter and camera serve every frame of a batch. Meshes
+    # are added once; later frames only change scalars, transforms and
+    # visibility, so producing an image never opens a window or rebuilds
+    # the scene.
+    def __init__(self, tunnel, window_size=(1024, 768), camera=DEFAULT_CAMERA):
+        self.plotter = pv.Plotter(off_screen=True, window_size=window_size)
+        self.plotter.set_background('white')
+        self.plotter.add_mesh(tunnel_mesh(tunnel), color="#00BFFF", opacity=0.3, name='tunnel')
+        self.plotter.camera_position = camera[0]
+        self.plotter.camera.azimuth = camera[1]
+        self.plotter.camera.elevation = camera[2]
+        self.object_mesh = None
+        self.object_actor = None
+        self.streamlines_actor = None
+        self.caption_actor = None
+
+    def set_object(self, mesh):
+        if mesh is self.object_mesh:
+            return
+        self.object_mesh = mesh
+        mesh.cell_data["pressure"] = np.zeros(mesh.n_cells)
+        mesh.cell_data.active_scalars_name = "pressure"
+        if self.object_actor is None:
+            self.object_actor = self.plotter.add_mesh(
+                mesh, scalars="pressure", cmap="coolwarm", name='object',
+                scalar_bar_args={'title': 'Pressure (Pa)'}
+            )
+            self.plotter.reset_camera()
+        else:
+            # Swap the model under the existing actor and scalar bar
+            self.object_actor.mapper.dataset = mesh
+
+    def update_pressure(self, cp, q, rotation=None, clim=None):
+        # Surface pressure q*Cp written into the existing cell array
+        np.multiply(cp, q, out=self.object_mesh.cell_data["pressure"])
+        self.object_mesh.GetCellData().GetArray("pressure").Modified()
+        matrix = np.eye(4)
+        if rotation is not None:
+            matrix[:3, :3] = rotation
+        self.object_actor.user_matrix = matrix
+        self.object_actor.mapper.scalar_range = clim or (BASE_CP * q, STAGNATION_CP * q)
+
+    def set_streamlines(self, streamlines):
+        if self.streamlines_actor is None:
+            self.streamlines_actor = self.plotter.add_mesh(streamlines, color='black', line_width=2,
+                                                           name='streamlines')
+        else:
+            self.streamlines_actor.mapper.dataset = streamlines
+
+    def show(self, object_visible=True, streamlines_visible=True):
+        if self.object_actor is not None:
+            self.object_actor.SetVisibility(object_visible)
+        if self.streamlines_actor is not None:
+            self.streamlines_actor.SetVisibility(streamlines_visible)
+
+    def set_caption(self, text):
+        if self.caption_actor is None:
+            self.caption_actor = self.plotter.add_text(text, position='upper_left', font_size=12,
+                                                       color='black', name='caption')
+        else:
+            self.caption_actor.SetText(2, text)
+
+    def screenshot(self, file_path=None):
+        # Off-screen plotters only render implicitly on their first frame
+        self.plotter.render()
+        if file_path is None:
+            return self.plotter.screenshot(return_img=True)
+        return self.plotter.screenshot(file_path)
+
+    def close(self):
+        self.plotter.close()
+
+
+def velocity_sweep_frames(cp, velocities, density, drag_forces, rotation=None):
+    # Orientation is fixed, so only the dynamic pressure changes per frame
+    for velocity, drag in zip(velocities, drag_forces):
+        q = 0.5 * density * velocity ** 2
+        yield cp, q, rotation, f"Velocity: {velocity:.1f} m/s\nDrag: {drag:.2f} N"
+
+
+def orientation_sweep_frames(area_vectors, yaws, pitches, q, drag_forces):
+    # Surface Cp is re-evaluated per frame from the unrotated area vectors
+    for yaw, pitch, drag in zip(yaws, pitches, drag_forces):
+        rotation = rotation_matrices(yaw, pitch)
+        cp = pressure_coefficients(area_vectors @ rotation.T)
+        yield cp, q, rotation, f"Yaw: {yaw:.1f}°  Pitch: {pitch:.1f}°\nDrag: {drag:.2f} N"
+
+
+def write_animation(renderer, frames, file_path, clim, fps=24):
+    # Frames go straight from the render window into the encoder; nothing is
+    # written to disk except the video itself
+    if imageio is None:
+        raise ImportError("Animation export requires imageio (pip install imageio imageio-ffmpeg)")
+    count = 0
+    with imageio.get_writer(file_path, fps=fps) as writer:
+        for cp, q, rotation, caption in frames:
+            renderer.update_pressure(cp, q, rotation, clim)
+            renderer.set_caption(caption)
+            writer.append_data(renderer.screenshot())
+            count += 1
+    return count
+
+
+def field_dataset(origin, spacing, flow_field, velocity, q, dims=PRESSURE_GRID_DIMS):
+    volume = pv.ImageData(dimensions=dims, origin=origin, spacing=spacing)
+    volume["pressure"] = q * flow_field["cp"]
+    volume["velocity"] = velocity * flow_field["velocity"]
+    volume["Cp"] = flow_field["cp"]
+    return volume
+
+
+def export_fields(file_path, volume, streamlines=None, surface=None):
+    # Binary, zlib-compressed VTK XML. A .vtm file references one .vti/.vtp
+    # piece per block, which ParaView loads on demand; a .vti path writes
+    # the flow volume alone.
+    if file_path.endswith(".vti"):
+        volume.save(file_path, binary=True)
+        return file_path
+    blocks = pv.MultiBlock()
+    blocks["flow"] = volume
+    if streamlines is not None and streamlines.n_points > 0:
+        blocks["streamlines"] = streamlines
+    if surface is not None:
+        blocks["surface"] = surface
+    blocks.save(file_path, binary=True)
+    return file_path